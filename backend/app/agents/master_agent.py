@@ -1,11 +1,50 @@
-import json
-from typing import Dict, Any, List
-from openai import OpenAI
+import asyncio
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Callable
+from app.agents.tools import execute_tools_concurrently
+from app.data.snapshot import get_snapshot
 from app.config.settings import get_settings
-from app.agents.tools import TOOL_DEFINITIONS, execute_tool, get_portfolio_context
+from app.agents.sections import ANALYSIS_SECTIONS, SectionParser, parse_sections, match_header
+from app.utils.llm import acall_chat, astream_chat, submit_llm, run_llm
+from app.utils.packer import pack_sections, pack_value
+from app.analytics.covariance import format_fit_table
 
 settings = get_settings()
-client = OpenAI(api_key=settings.openai_api_key)
+
+# Data without which no meaningful report can be written; other tools degrade to error entries
+REQUIRED_DATA = ("financials",)
+
+# Order in which gathered data claims the analysis token budget
+ANALYSIS_DATA_PRIORITY = ("financials", "company_info", "risks", "news", "other", "portfolio")
+
+# What each standard section should cover, shared by the single and per-section prompts
+SECTION_INSTRUCTIONS = {
+    "recommendation": "Write 2-3 paragraphs. Start with a clear BUY, HOLD, or SELL recommendation. Explain the key reasons supporting this recommendation. Include target price if data supports it.",
+    "company_overview": "Write 2-3 paragraphs about what the company does, its market position, competitive advantages, and key products/services.",
+    "financial_analysis": "Write 2-3 paragraphs analyzing revenue, earnings, margins, valuation (P/E, P/B ratios), balance sheet health, and cash flow. Use specific numbers from the data.",
+    "risk_assessment": "Write 2-3 paragraphs about key investment risks including market risks, financial risks (debt, liquidity), competitive risks, and any governance concerns.",
+    "news_analysis": "Write 1-2 paragraphs about recent news, market sentiment, and potential upcoming catalysts.",
+}
+
+# Gathered data each section is given when it is written by its own prompt
+SECTION_DATA = {
+    "recommendation": ("financials", "company_info", "risks", "news", "other"),
+    "company_overview": ("company_info", "other"),
+    "financial_analysis": ("financials",),
+    "risk_assessment": ("risks", "financials"),
+    "news_analysis": ("news",),
+    "custom_section": ("other", "company_info", "financials", "risks", "news"),
+    "portfolio_fit": ("company_info", "financials", "risks"),
+}
+
+# Output cap for one section written by its own prompt
+SECTION_MAX_TOKENS = 900
+
+# Called with (step, payload) as each stage of the pipeline finishes
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+# Called with (section, text) as soon as each written section is complete
+SectionCallback = Callable[[str, str], None]
 
 # Topics that warrant a dedicated custom section (not already covered in standard sections)
 CUSTOM_SECTION_TOPICS = {
@@ -71,38 +110,80 @@ def detect_custom_section_topic(custom_request: str) -> tuple[str, str]:
     return None, None
 
 
-def run_master_agent(ticker: str, company_name: str, user_query: str, custom_request: str = "") -> Dict[str, Any]:
+def run_master_agent(ticker: str, company_name: str, user_query: str, custom_request: str = "",
+                     use_cache: bool = True, on_event: Optional[EventCallback] = None) -> Dict[str, Any]:
     """Master agent that uses tool calling to gather data and generate analysis."""
     
-    # Gather all data first
-    gathered_data = {
-        "company_info": execute_tool("get_company_info", {"ticker": ticker}),
-        "financials": execute_tool("get_financials", {"ticker": ticker}),
-        "risks": execute_tool("get_risks", {"ticker": ticker}),
-        "news": execute_tool("get_news", {"ticker": ticker}),
+    emit = on_event or (lambda step, payload: None)
+    
+    # One shared snapshot so every tool reuses the same .info download
+    snapshot = get_snapshot(ticker)
+    
+    # Reflections only need the headlines, so they start as soon as get_news returns
+    reflections_future: Optional[Future] = None
+    
+    def on_tool_result(key: str, result: Dict[str, Any]):
+        nonlocal reflections_future
+        emit("tool", {"tool": key, "ok": "error" not in result, "error": result.get("error")})
+        if key == "news" and result.get("articles"):
+            reflections_future = submit_llm(
+                agenerate_news_reflections(ticker, company_name, result["articles"][:5], use_cache=use_cache)
+            )
+    
+    # Gather all data concurrently; the stage takes as long as its slowest tool
+    calls = {
+        "company_info": ("get_company_info", {"ticker": ticker, "snapshot": snapshot}),
+        "financials": ("get_financials", {"ticker": ticker, "snapshot": snapshot}),
+        "risks": ("get_risks", {"ticker": ticker, "snapshot": snapshot}),
+        "news": ("get_news", {"ticker": ticker, "snapshot": snapshot}),
     }
     
     if custom_request:
-        gathered_data["other"] = execute_tool("get_other", {"ticker": ticker, "custom_request": custom_request})
+        calls["other"] = ("get_other", {"ticker": ticker, "custom_request": custom_request, "snapshot": snapshot})
+    
+    calls["portfolio"] = ("get_portfolio_context", {})
+    calls["portfolio_fit"] = ("get_portfolio_fit", {"candidate": ticker})
+    
+    try:
+        gathered_data = execute_tools_concurrently(
+            calls, timeouts={"portfolio_fit": settings.portfolio_fit_timeout_seconds},
+            required=REQUIRED_DATA, on_result=on_tool_result
+        )
+    except Exception:
+        if reflections_future:
+            reflections_future.cancel()
+        raise
+    
+    portfolio_context = gathered_data["portfolio"]
+    if "error" in portfolio_context:
+        portfolio_context = {"holdings": [], "total_value": 0, "sectors": {}}
+        gathered_data["portfolio"] = portfolio_context
+    
+    # The correlation figures are optional: a failed or timed-out fit never affects the holdings
+    fit = gathered_data.pop("portfolio_fit")
+    if portfolio_context["holdings"] and "error" not in fit:
+        portfolio_context["correlation"] = fit
     
-    # Get portfolio context
-    portfolio_context = get_portfolio_context()
-    gathered_data["portfolio"] = portfolio_context
+    emit("analyzing", {"tools": sorted(gathered_data)})
     
     # Detect if we need a custom section
     custom_section_title, custom_topic = detect_custom_section_topic(custom_request)
     
-    # Generate analysis
-    analysis = generate_analysis(
+    # Generate analysis while the news reflections are still in flight; when someone is
+    # listening, stream it so each section is reported the moment the model finishes it
+    on_section = None
+    if on_event:
+        on_section = lambda section, text: emit("section", {"section": section, "content": text})
+    
+    analysis = run_llm(agenerate_analysis(
         ticker, company_name, user_query, custom_request, 
-        gathered_data, portfolio_context, custom_section_title
-    )
+        gathered_data, portfolio_context, custom_section_title, use_cache=use_cache,
+        on_section=on_section
+    ))
     
-    # Generate news reflections
-    news_data = gathered_data.get("news", {})
-    if news_data.get("articles"):
-        news_reflections = generate_news_reflections(ticker, company_name, news_data["articles"][:5])
-        analysis["news_reflections"] = news_reflections
+    if reflections_future:
+        analysis["news_reflections"] = reflections_future.result()
+        emit("reflections", {"count": len(analysis["news_reflections"])})
     
     # Store custom section title in analysis
     if custom_section_title:
@@ -119,8 +200,15 @@ def run_master_agent(ticker: str, company_name: str, user_query: str, custom_req
     }
 
 
-def generate_news_reflections(ticker: str, company_name: str, articles: List[Dict]) -> List[Dict]:
+def generate_news_reflections(ticker: str, company_name: str, articles: List[Dict],
+                              use_cache: bool = True) -> List[Dict]:
     """Generate AI reflections on what each news article means for the company's future."""
+    return run_llm(agenerate_news_reflections(ticker, company_name, articles, use_cache=use_cache))
+
+
+async def agenerate_news_reflections(ticker: str, company_name: str, articles: List[Dict],
+                                     use_cache: bool = True) -> List[Dict]:
+    """Async variant of generate_news_reflections; runs on the shared LLM loop."""
     if not articles:
         return []
     
@@ -143,14 +231,12 @@ REFLECTION: [your 1-2 sentence analysis]
 Repeat for each headline."""
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        content = await acall_chat(
             messages=[{"role": "user", "content": prompt}],
             max_tokens=1000,
-            temperature=0.7
+            temperature=0.7,
+            use_cache=use_cache
         )
-        
-        content = response.choices[0].message.content
         reflections = []
         
         current_headline = None
@@ -210,19 +296,44 @@ Repeat for each headline."""
 
 def generate_analysis(ticker: str, company_name: str, user_query: str, custom_request: str, 
                      data: Dict[str, Any], portfolio_context: Dict[str, Any] = None,
-                     custom_section_title: str = None) -> Dict[str, str]:
-    """Generate written analysis sections from gathered data"""
+                     custom_section_title: str = None, use_cache: bool = True,
+                     mode: Optional[str] = None) -> Dict[str, str]:
+    """
+    Generate written analysis sections from gathered data.
+    mode is "single" (one completion writes every section) or "parallel" (one concurrent
+    completion per section); it defaults to the analysis_mode setting.
+    """
+    return run_llm(agenerate_analysis(
+        ticker, company_name, user_query, custom_request, data, portfolio_context, custom_section_title,
+        use_cache=use_cache, mode=mode
+    ))
+
+
+async def agenerate_analysis(ticker: str, company_name: str, user_query: str, custom_request: str, 
+                             data: Dict[str, Any], portfolio_context: Dict[str, Any] = None,
+                             custom_section_title: str = None, use_cache: bool = True,
+                             on_section: Optional[SectionCallback] = None,
+                             mode: Optional[str] = None) -> Dict[str, str]:
+    """
+    Async variant of generate_analysis; runs on the shared LLM loop.
+    With on_section each section is passed on as soon as it is complete (the single
+    completion is streamed for this).
+    """
+    
+    has_portfolio = bool(portfolio_context and portfolio_context.get("holdings"))
     
-    data_summary = json.dumps(data, indent=2, default=str)[:12000]
+    # Holdings are packed into the PORTFOLIO_FIT block, so they are not repeated under DATA
+    data_sections = {k: v for k, v in data.items() if not (has_portfolio and k == "portfolio")}
     
     # Build portfolio section prompt if portfolio exists
-    portfolio_prompt = ""
-    if portfolio_context and portfolio_context.get("holdings"):
-        portfolio_summary = json.dumps(portfolio_context, indent=2, default=str)[:3000]
-        portfolio_prompt = f"""
-
-PORTFOLIO_FIT:
-The user has an existing portfolio. Analyze how {company_name} ({ticker}) would fit into their current holdings:
+    if has_portfolio:
+        # Correlation figures go in as a compact table rather than packed JSON
+        fit = portfolio_context.get("correlation")
+        holdings_context = {k: v for k, v in portfolio_context.items() if k != "correlation"}
+        portfolio_summary = pack_value(holdings_context, settings.portfolio_token_budget)
+        if fit:
+            portfolio_summary = f"{portfolio_summary}\n{format_fit_table(fit)}"
+        portfolio_instructions = f"""The user has an existing portfolio. Analyze how {company_name} ({ticker}) would fit into their current holdings:
 {portfolio_summary}
 
 Write 2-3 paragraphs analyzing:
@@ -231,21 +342,37 @@ Write 2-3 paragraphs analyzing:
 3. Portfolio balance - considering the user's current allocations, would adding this stock improve or worsen their portfolio balance?
 4. Specific recommendation on position sizing if adding to portfolio."""
     else:
-        portfolio_prompt = """
+        portfolio_instructions = """The user does not have any existing portfolio holdings tracked. Write 1 paragraph suggesting that they can add their holdings in the Portfolio tab to receive personalized portfolio fit analysis in future reports."""
+    
+    portfolio_prompt = f"""
 
 PORTFOLIO_FIT:
-The user does not have any existing portfolio holdings tracked. Write 1 paragraph suggesting that they can add their holdings in the Portfolio tab to receive personalized portfolio fit analysis in future reports."""
+{portfolio_instructions}"""
+    
+    instructions = {**SECTION_INSTRUCTIONS, "portfolio_fit": portfolio_instructions}
     
     # Build custom section prompt if needed
     custom_section_prompt = ""
     if custom_section_title and custom_request:
-        custom_section_prompt = f"""
-
-CUSTOM_SECTION:
-The user specifically requested information about: {custom_request}
+        instructions["custom_section"] = f"""The user specifically requested information about: {custom_request}
 Section Title: {custom_section_title}
 
 Write 2-3 detailed paragraphs addressing this specific request. Use any relevant data available and provide actionable insights. Be thorough and specific to what the user asked for."""
+        custom_section_prompt = f"""
+
+CUSTOM_SECTION:
+{instructions["custom_section"]}"""
+    
+    if (mode or settings.analysis_mode) == "parallel":
+        return await agenerate_sections_parallel(
+            ticker, company_name, user_query, custom_request, data_sections, instructions,
+            use_cache=use_cache, on_section=on_section
+        )
+    
+    standard_prompt = "\n\n".join(
+        f"{section.upper()}:\n{text}" for section, text in SECTION_INSTRUCTIONS.items()
+    )
+    data_summary = pack_sections(data_sections, settings.analysis_token_budget, ANALYSIS_DATA_PRIORITY)
     
     analysis_prompt = f"""You are a senior investment analyst writing a research report for {company_name} ({ticker}).
 
@@ -259,20 +386,7 @@ Write a professional stock research report. Output ONLY plain text paragraphs, N
 
 Write these sections as flowing paragraphs:
 
-RECOMMENDATION:
-Write 2-3 paragraphs. Start with a clear BUY, HOLD, or SELL recommendation. Explain the key reasons supporting this recommendation. Include target price if data supports it.
-
-COMPANY_OVERVIEW:
-Write 2-3 paragraphs about what the company does, its market position, competitive advantages, and key products/services.
-
-FINANCIAL_ANALYSIS:
-Write 2-3 paragraphs analyzing revenue, earnings, margins, valuation (P/E, P/B ratios), balance sheet health, and cash flow. Use specific numbers from the data.
-
-RISK_ASSESSMENT:
-Write 2-3 paragraphs about key investment risks including market risks, financial risks (debt, liquidity), competitive risks, and any governance concerns.
-
-NEWS_ANALYSIS:
-Write 1-2 paragraphs about recent news, market sentiment, and potential upcoming catalysts.
+{standard_prompt}
 {custom_section_prompt}{portfolio_prompt}
 
 Format your response EXACTLY like this (with section headers in caps followed by colon):
@@ -298,74 +412,79 @@ CUSTOM_SECTION:
 PORTFOLIO_FIT:
 [your paragraphs here]"""
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": analysis_prompt}],
-        max_tokens=3500,
-        temperature=0.7
-    )
-    
-    content = response.choices[0].message.content
-    
-    # Parse sections
-    sections = {
-        "recommendation": "",
-        "company_overview": "",
-        "financial_analysis": "",
-        "risk_assessment": "",
-        "news_analysis": "",
-        "custom_section": "",
-        "portfolio_fit": ""
-    }
+    messages = [{"role": "user", "content": analysis_prompt}]
     
-    current_section = None
-    current_content = []
-    
-    for line in content.split('\n'):
-        line_upper = line.strip().upper()
-        if line_upper.startswith('RECOMMENDATION:'):
-            if current_section:
-                sections[current_section] = '\n'.join(current_content).strip()
-            current_section = "recommendation"
-            current_content = [line.split(':', 1)[1].strip()] if ':' in line else []
-        elif line_upper.startswith('COMPANY_OVERVIEW:') or line_upper.startswith('COMPANY OVERVIEW:'):
-            if current_section:
-                sections[current_section] = '\n'.join(current_content).strip()
-            current_section = "company_overview"
-            current_content = [line.split(':', 1)[1].strip()] if ':' in line else []
-        elif line_upper.startswith('FINANCIAL_ANALYSIS:') or line_upper.startswith('FINANCIAL ANALYSIS:'):
-            if current_section:
-                sections[current_section] = '\n'.join(current_content).strip()
-            current_section = "financial_analysis"
-            current_content = [line.split(':', 1)[1].strip()] if ':' in line else []
-        elif line_upper.startswith('RISK_ASSESSMENT:') or line_upper.startswith('RISK ASSESSMENT:'):
-            if current_section:
-                sections[current_section] = '\n'.join(current_content).strip()
-            current_section = "risk_assessment"
-            current_content = [line.split(':', 1)[1].strip()] if ':' in line else []
-        elif line_upper.startswith('NEWS_ANALYSIS:') or line_upper.startswith('NEWS ANALYSIS:'):
-            if current_section:
-                sections[current_section] = '\n'.join(current_content).strip()
-            current_section = "news_analysis"
-            current_content = [line.split(':', 1)[1].strip()] if ':' in line else []
-        elif line_upper.startswith('CUSTOM_SECTION:') or line_upper.startswith('CUSTOM SECTION:'):
-            if current_section:
-                sections[current_section] = '\n'.join(current_content).strip()
-            current_section = "custom_section"
-            current_content = [line.split(':', 1)[1].strip()] if ':' in line else []
-        elif line_upper.startswith('PORTFOLIO_FIT:') or line_upper.startswith('PORTFOLIO FIT:'):
-            if current_section:
-                sections[current_section] = '\n'.join(current_content).strip()
-            current_section = "portfolio_fit"
-            current_content = [line.split(':', 1)[1].strip()] if ':' in line else []
-        elif current_section:
-            current_content.append(line)
-    
-    if current_section:
-        sections[current_section] = '\n'.join(current_content).strip()
+    if on_section:
+        parser = SectionParser()
+        chunks = []
+        async for chunk in astream_chat(messages, max_tokens=3500, temperature=0.7, use_cache=use_cache):
+            chunks.append(chunk)
+            for section, text in parser.feed(chunk):
+                on_section(section, text)
+        for section, text in parser.close():
+            on_section(section, text)
+        content = "".join(chunks)
+        sections = parser.sections
+    else:
+        content = await acall_chat(messages, max_tokens=3500, temperature=0.7, use_cache=use_cache)
+        sections = parse_sections(content)
     
     # Fallback if parsing failed
     if not any(sections.values()):
         sections["recommendation"] = content
     
     return sections
+
+
+async def agenerate_sections_parallel(ticker: str, company_name: str, user_query: str, custom_request: str,
+                                      data: Dict[str, Any], instructions: Dict[str, str],
+                                      use_cache: bool = True,
+                                      on_section: Optional[SectionCallback] = None) -> Dict[str, str]:
+    """
+    Write each section with its own focused prompt, all concurrently, so wall time is set by
+    the longest section rather than the whole report. Each prompt only carries the slice of
+    data listed for it in SECTION_DATA. A section whose call fails is left empty; the error
+    is raised only if every section failed.
+    """
+    sections = {section: "" for section in ANALYSIS_SECTIONS}
+    
+    async def write_section(section: str) -> str:
+        data_slice = {k: data[k] for k in SECTION_DATA.get(section, ()) if k in data}
+        data_summary = pack_sections(data_slice, settings.section_token_budget, ANALYSIS_DATA_PRIORITY)
+        prompt = f"""You are a senior investment analyst writing the {section.upper()} section of a research report for {company_name} ({ticker}).
+
+DATA:
+{data_summary or "No additional data."}
+
+USER REQUEST: {user_query}
+{f'SPECIFIC FOCUS: {custom_request}' if custom_request else ''}
+
+{instructions[section]}
+
+Output ONLY the plain text paragraphs of this section, with no section header, JSON or bullet points."""
+        
+        text = (await acall_chat(
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=SECTION_MAX_TOKENS,
+            temperature=0.7,
+            use_cache=use_cache
+        )).strip()
+        header = match_header(text.split("\n", 1)[0])
+        if header and header[0] == section:
+            # Drop a header the model added anyway
+            text = (header[1] + "\n" + (text.split("\n", 1)[1] if "\n" in text else "")).strip()
+        if on_section and text:
+            on_section(section, text)
+        return text
+    
+    names = [section for section in ANALYSIS_SECTIONS if section in instructions]
+    results = await asyncio.gather(*(write_section(section) for section in names), return_exceptions=True)
+    
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors and len(errors) == len(results):
+        raise errors[0]
+    
+    for section, result in zip(names, results):
+        if not isinstance(result, BaseException):
+            sections[section] = result
+    return sections
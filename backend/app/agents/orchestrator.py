@@ -1,11 +1,16 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from app.utils.validation import resolve_company_to_ticker, parse_user_query
-from app.agents.master_agent import run_master_agent
-from app.agents.tools import get_price_history
+from app.agents.master_agent import run_master_agent, EventCallback
+from app.agents.tools import get_price_history, ToolExecutionError
 
 
-def orchestrate_research(query: str) -> Dict[str, Any]:
-    """Main orchestration function for research pipeline"""
+def orchestrate_research(query: str, use_cache: bool = True,
+                         on_event: Optional[EventCallback] = None) -> Dict[str, Any]:
+    """
+    Main orchestration function for research pipeline. use_cache=False forces fresh LLM output.
+    on_event is called with (step, payload) as each stage actually finishes.
+    """
+    emit = on_event or (lambda step, payload: None)
     
     # Parse the user query
     parsed = parse_user_query(query)
@@ -13,7 +18,7 @@ def orchestrate_research(query: str) -> Dict[str, Any]:
     custom_request = parsed["custom_request"]
     
     # Resolve ticker
-    ticker, company_name, error = resolve_company_to_ticker(company_query)
+    ticker, company_name, error = resolve_company_to_ticker(company_query, use_cache=use_cache)
     
     if error:
         return {
@@ -21,17 +26,28 @@ def orchestrate_research(query: str) -> Dict[str, Any]:
             "error": error
         }
     
+    emit("resolved", {"ticker": ticker, "company": company_name})
+    
     # Run master agent
-    result = run_master_agent(
-        ticker=ticker,
-        company_name=company_name,
-        user_query=query,
-        custom_request=custom_request
-    )
+    try:
+        result = run_master_agent(
+            ticker=ticker,
+            company_name=company_name,
+            user_query=query,
+            custom_request=custom_request,
+            use_cache=use_cache,
+            on_event=on_event
+        )
+    except ToolExecutionError as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
     
     # Get price history for charts
     price_data = get_price_history(ticker, "1y")
     result["price_data"] = price_data
+    emit("prices", {"ok": "error" not in price_data})
     
     return {
         "success": True,
@@ -144,6 +144,21 @@ CUSTOM_SECTION_PROMPT = """Based on all the research data available for {company
 Use all relevant data from company analysis, financial data, risk assessment, and news to address this specific request.
 Be thorough and specific in your response."""
 
+PORTFOLIO_RATING_SYSTEM = """You are a portfolio manager reviewing a client's holdings.
+Your role is to explain quantitative portfolio ratings in plain language and suggest practical improvements."""
+
+PORTFOLIO_RATING_PROMPT = """The client's portfolio has been scored 0-100 (higher is better) on diversification, concentration (HHI of position weights), valuation (P/E), risk (volatility and drawdown) and momentum (3-12 month returns). Letter ratings run A (80+) to F.
+
+RATINGS:
+{ratings}
+
+Write 3-4 paragraphs of plain text, NOT JSON or bullet points:
+1. Overall assessment: what the portfolio rating says and its main strengths
+2. Weak spots: the lowest-scoring categories and the holdings driving them
+3. Suggestions: concrete changes to weights or sector exposure that would raise the weakest scores
+
+Refer to the numbers given; do not invent figures that are not in the ratings."""
+
 
 def get_company_prompt(company_name: str, ticker: str, company_data: str) -> tuple[str, str]:
     """Get company agent prompt"""
@@ -242,3 +257,10 @@ def get_custom_section_prompt(company_name: str, ticker: str, custom_request: st
         )
     )
 
+
+def get_portfolio_rating_prompt(ratings: str) -> tuple[str, str]:
+    """Get portfolio rating narrative prompt"""
+    return (
+        PORTFOLIO_RATING_SYSTEM,
+        PORTFOLIO_RATING_PROMPT.format(ratings=ratings)
+    )
@@ -0,0 +1,83 @@
+from typing import Dict, List, Optional, Tuple
+
+# Written sections of the report, in the order the model is asked to produce them
+ANALYSIS_SECTIONS = (
+    "recommendation", "company_overview", "financial_analysis", "risk_assessment",
+    "news_analysis", "custom_section", "portfolio_fit"
+)
+
+# Header text (before the colon, spaces and underscores alike) -> section key
+SECTION_HEADERS = {section.upper(): section for section in ANALYSIS_SECTIONS}
+
+
+def match_header(line: str) -> Optional[Tuple[str, str]]:
+    """Return (section, text after the colon) if the line opens a section, otherwise None"""
+    stripped = line.strip().lstrip("#*").strip()
+    if ":" not in stripped:
+        return None
+    header, rest = stripped.split(":", 1)
+    section = SECTION_HEADERS.get(header.strip().strip("*").upper().replace(" ", "_"))
+    if section is None:
+        return None
+    return section, rest.strip().lstrip("*").strip()
+
+
+class SectionParser:
+    """
+    Incremental parser for the sectioned analysis format.
+
+    Text is fed in arbitrary chunks as it streams from the model. A section is
+    complete once the next section header is seen (or the stream is closed), and
+    feed() returns every section completed by that chunk.
+    """
+
+    def __init__(self):
+        self.sections: Dict[str, str] = {section: "" for section in ANALYSIS_SECTIONS}
+        self._buffer = ""
+        self._current: Optional[str] = None
+        self._content: List[str] = []
+
+    def _finish_current(self) -> List[Tuple[str, str]]:
+        if not self._current:
+            return []
+        text = "\n".join(self._content).strip()
+        self.sections[self._current] = text
+        return [(self._current, text)]
+
+    def _consume_line(self, line: str) -> List[Tuple[str, str]]:
+        header = match_header(line)
+        if header is None:
+            if self._current:
+                self._content.append(line)
+            return []
+        finished = self._finish_current()
+        self._current, first_line = header
+        self._content = [first_line] if first_line else []
+        return finished
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Add streamed text. Returns (section, text) for each section it completed."""
+        self._buffer += chunk
+        finished = []
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            finished.extend(self._consume_line(line))
+        return finished
+
+    def close(self) -> List[Tuple[str, str]]:
+        """Flush the final section at the end of the stream"""
+        finished = []
+        if self._buffer:
+            finished.extend(self._consume_line(self._buffer))
+            self._buffer = ""
+        finished.extend(self._finish_current())
+        self._current = None
+        return finished
+
+
+def parse_sections(content: str) -> Dict[str, str]:
+    """Split a complete analysis into its sections"""
+    parser = SectionParser()
+    parser.feed(content)
+    parser.close()
+    return parser.sections
@@ -1,15 +1,43 @@
-import yfinance as yf
 import os
 import json
-from typing import Dict, Any, List
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Optional, Tuple, Callable, Iterable
 from datetime import datetime, timedelta
+import numpy as np
+from app.config.paths import DATA_DIR
+from app.config.settings import get_settings
+from app.data.snapshot import TickerSnapshot, get_snapshot
+from app.data.price_store import price_store
+from app.analytics.risk import risk_metrics
+from app.analytics.covariance import portfolio_fit
+from app.analytics.valuation import value_holdings
+from app.utils.cache import TTLCache
+from app.utils.downsample import lttb, build_pyramid, pick_level
 
+settings = get_settings()
 
-def get_company_info(ticker: str) -> Dict[str, Any]:
+# Holding quotes are loaded on their own pool (app.data.quotes), so a tool never waits on a slot it holds
+_tool_executor = ThreadPoolExecutor(max_workers=settings.tool_max_workers, thread_name_prefix="tool")
+
+
+# (ticker, period) -> (series signature, LTTB pyramid), rebuilt whenever the stored series changes.
+# Bounded on its own: least recently charted series are evicted past price_pyramid_cache_size.
+_price_pyramids: TTLCache[Tuple[Tuple, Dict[int, np.ndarray]]] = TTLCache(
+    max_size=settings.price_pyramid_cache_size,
+    ttl_seconds=settings.price_refresh_seconds
+)
+
+
+class ToolExecutionError(RuntimeError):
+    """Raised when a tool the pipeline cannot do without fails or times out"""
+
+
+def get_company_info(ticker: str, snapshot: Optional[TickerSnapshot] = None) -> Dict[str, Any]:
     """Get company overview, business description, and basic info"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        snapshot = snapshot or get_snapshot(ticker)
+        info = snapshot.info
         
         return {
             "ticker": ticker,
@@ -29,11 +57,11 @@ def get_company_info(ticker: str) -> Dict[str, Any]:
         return {"error": str(e)}
 
 
-def get_financials(ticker: str) -> Dict[str, Any]:
+def get_financials(ticker: str, snapshot: Optional[TickerSnapshot] = None) -> Dict[str, Any]:
     """Get financial data, metrics, and valuation"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        snapshot = snapshot or get_snapshot(ticker)
+        info = snapshot.info
         
         return {
             "ticker": ticker,
@@ -69,27 +97,27 @@ def get_financials(ticker: str) -> Dict[str, Any]:
         return {"error": str(e)}
 
 
-def get_risks(ticker: str) -> Dict[str, Any]:
+def get_risks(ticker: str, snapshot: Optional[TickerSnapshot] = None) -> Dict[str, Any]:
     """Get risk-related data and metrics"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        snapshot = snapshot or get_snapshot(ticker)
+        info = snapshot.info
         
-        beta = info.get("beta", "N/A")
-        
-        hist = stock.history(period="3mo")
-        volatility = "N/A"
-        if not hist.empty and len(hist) > 1:
-            returns = hist['Close'].pct_change().dropna()
-            if len(returns) > 0:
-                volatility = round(returns.std() * (252 ** 0.5) * 100, 2)
+        metrics = risk_metrics([ticker], snapshots={ticker.upper(): snapshot})[ticker.upper()]
+        beta = metrics.pop("beta", None)
+        price_risk = {name: "N/A" if value is None else value for name, value in metrics.items()}
         
         return {
             "ticker": ticker,
-            "beta": beta,
+            # Beta against the benchmark from local history; Yahoo's 5y monthly beta if that is unavailable
+            "beta": beta if beta is not None else info.get("beta", "N/A"),
+            "reported_beta": info.get("beta", "N/A"),
+            "benchmark": settings.risk_benchmark,
             "debt_to_equity": info.get("debtToEquity", "N/A"),
             "current_ratio": info.get("currentRatio", "N/A"),
-            "volatility_percent": volatility,
+            # 3-month volatility, as reported before the full metric set was added
+            "volatility_percent": price_risk.get("volatility_3m_percent", "N/A"),
+            **price_risk,
             "short_percent_of_float": info.get("shortPercentOfFloat", "N/A"),
             "held_percent_insiders": info.get("heldPercentInsiders", "N/A"),
             "held_percent_institutions": info.get("heldPercentInstitutions", "N/A"),
@@ -103,11 +131,11 @@ def get_risks(ticker: str) -> Dict[str, Any]:
         return {"error": str(e)}
 
 
-def get_news(ticker: str) -> Dict[str, Any]:
+def get_news(ticker: str, snapshot: Optional[TickerSnapshot] = None) -> Dict[str, Any]:
     """Get recent news and sentiment indicators"""
     try:
-        stock = yf.Ticker(ticker)
-        news_data = stock.news or []
+        snapshot = snapshot or get_snapshot(ticker)
+        news_data = snapshot.stock.news or []
         
         articles = []
         for item in news_data[:10]:
@@ -178,45 +206,75 @@ def get_news(ticker: str) -> Dict[str, Any]:
         return {"error": str(e), "articles": [], "article_count": 0}
 
 
-def get_price_history(ticker: str, period: str = "1y") -> Dict[str, Any]:
-    """Get historical price data for charts"""
+def _downsample_bars(ticker: str, period: str, bars: np.ndarray, max_points: int) -> np.ndarray:
+    """Bars reduced to at most max_points with LTTB on the close, served from the cached pyramid"""
+    x = bars["date"].astype("int64")
+    signature = (len(bars), str(bars["date"][0]), str(bars["date"][-1]), float(bars["close"][-1]))
+    key = (ticker.upper(), period)
+    cached = _price_pyramids.get(key)
+    if cached is None or cached[0] != signature:
+        cached = (signature, build_pyramid(x, bars["close"]))
+        _price_pyramids.set(key, cached)
+    
+    indices = pick_level(cached[1], max_points)
+    if indices is None:
+        indices = lttb(x, bars["close"], max_points)
+    return bars[indices]
+
+
+def get_price_history(ticker: str, period: str = "1y", snapshot: Optional[TickerSnapshot] = None,
+                      layout: str = "rows", max_points: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Get historical price data for charts.
+    layout="rows" returns one dict per day under "prices"; layout="columns" returns parallel
+    arrays (dates, open, high, low, close, volume) under "columns", which is far smaller.
+    max_points caps the number of days returned using LTTB downsampling of the close, picking
+    the finest precomputed level that fits; the summary fields always cover the full period.
+    """
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period=period)
+        bars = price_store.get_bars(ticker, period, snapshot)
         
-        if hist.empty:
+        if len(bars) == 0:
             return {"error": "No historical data available"}
         
-        prices = []
-        for date, row in hist.iterrows():
-            prices.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "open": round(row["Open"], 2),
-                "high": round(row["High"], 2),
-                "low": round(row["Low"], 2),
-                "close": round(row["Close"], 2),
-                "volume": int(row["Volume"]),
-            })
+        total_points = len(bars)
+        first_close, last_close = round(float(bars["close"][0]), 2), round(float(bars["close"][-1]), 2)
+        first_date, last_date = str(bars["date"][0]), str(bars["date"][-1])
+        if max_points and total_points > max_points:
+            bars = _downsample_bars(ticker, period, bars, max_points)
         
-        return {
-            "ticker": ticker,
-            "period": period,
-            "prices": prices,
-            "start_date": prices[0]["date"] if prices else "",
-            "end_date": prices[-1]["date"] if prices else "",
-            "start_price": prices[0]["close"] if prices else 0,
-            "end_price": prices[-1]["close"] if prices else 0,
-            "change_percent": round(((prices[-1]["close"] - prices[0]["close"]) / prices[0]["close"]) * 100, 2) if prices else 0,
-        }
+        columns = {"dates": bars["date"].astype(str).tolist()}
+        for field in ("open", "high", "low", "close"):
+            columns[field] = np.round(bars[field], 2).tolist()
+        columns["volume"] = bars["volume"].tolist()
+        
+        result = {"ticker": ticker, "period": period}
+        if layout == "columns":
+            result["columns"] = columns
+        else:
+            result["prices"] = [
+                {"date": d, "open": o, "high": h, "low": l, "close": c, "volume": v}
+                for d, o, h, l, c, v in zip(*columns.values())
+            ]
+        result.update({
+            "start_date": first_date,
+            "end_date": last_date,
+            "start_price": first_close,
+            "end_price": last_close,
+            "change_percent": round((last_close - first_close) / first_close * 100, 2) if first_close else 0,
+        })
+        if max_points:
+            result["total_points"] = total_points
+        return result
     except Exception as e:
         return {"error": str(e)}
 
 
-def get_other(ticker: str, custom_request: str) -> Dict[str, Any]:
+def get_other(ticker: str, custom_request: str, snapshot: Optional[TickerSnapshot] = None) -> Dict[str, Any]:
     """Get additional data based on custom user request"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        snapshot = snapshot or get_snapshot(ticker)
+        info = snapshot.info
         
         data = {
             "ticker": ticker,
@@ -312,76 +370,61 @@ TOOL_DEFINITIONS = [
 ]
 
 
-def get_portfolio_context() -> Dict[str, Any]:
-    """Get current portfolio holdings with enriched data for analysis"""
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    DATA_DIR = os.path.join(BASE_DIR, "data")
+# Per-holding fields passed to the analysis prompt
+PORTFOLIO_CONTEXT_FIELDS = (
+    "ticker", "shares", "company_name", "current_price", "value", "weight",
+    "sector", "pe_ratio", "dividend_yield", "beta",
+)
+
+
+def _load_portfolio() -> List[Dict[str, Any]]:
+    """Stored holdings, or an empty list if there are none or the file cannot be read"""
     PORTFOLIO_FILE = os.path.join(DATA_DIR, "portfolio.json")
     
     if not os.path.exists(PORTFOLIO_FILE):
-        return {"holdings": [], "total_value": 0, "sectors": {}}
+        return []
     
     try:
         with open(PORTFOLIO_FILE, "r") as f:
-            holdings = json.load(f)
+            return json.load(f) or []
     except:
-        return {"holdings": [], "total_value": 0, "sectors": {}}
-    
+        return []
+
+
+def get_portfolio_context() -> Dict[str, Any]:
+    """Get current portfolio holdings with enriched data for analysis."""
+    holdings = _load_portfolio()
     if not holdings:
         return {"holdings": [], "total_value": 0, "sectors": {}}
     
-    enriched = []
-    total_value = 0
-    sectors = {}
-    
-    for h in holdings:
-        try:
-            financials = get_financials(h["ticker"])
-            current_price = financials.get("current_price", 0) or 0
-            value = current_price * h["shares"]
-            total_value += value
-            
-            sector = financials.get("sector", "Unknown")
-            if sector not in sectors:
-                sectors[sector] = {"value": 0, "tickers": []}
-            sectors[sector]["value"] += value
-            sectors[sector]["tickers"].append(h["ticker"])
-            
-            enriched.append({
-                "ticker": h["ticker"],
-                "shares": h["shares"],
-                "company_name": h.get("company_name", h["ticker"]),
-                "current_price": current_price,
-                "value": value,
-                "sector": sector,
-                "pe_ratio": financials.get("pe_ratio"),
-                "dividend_yield": financials.get("dividend_yield"),
-                "beta": financials.get("beta"),
-            })
-        except:
-            enriched.append({
-                "ticker": h["ticker"],
-                "shares": h["shares"],
-                "company_name": h.get("company_name", h["ticker"]),
-                "current_price": 0,
-                "value": 0,
-                "sector": "Unknown"
-            })
-    
-    for h in enriched:
-        h["weight"] = (h["value"] / total_value * 100) if total_value > 0 else 0
-    
-    for sector in sectors:
-        sectors[sector]["weight"] = (sectors[sector]["value"] / total_value * 100) if total_value > 0 else 0
-    
+    valuation = value_holdings(holdings)
     return {
-        "holdings": enriched,
-        "total_value": total_value,
-        "total_holdings": len(enriched),
-        "sectors": sectors
+        "holdings": [
+            {key: h.get(key) for key in PORTFOLIO_CONTEXT_FIELDS}
+            for h in valuation["holdings"]
+        ],
+        "total_value": valuation["total_value"],
+        "total_holdings": valuation["total_holdings"],
+        "sectors": valuation["sectors"]
     }
 
 
+def get_portfolio_fit(candidate: str) -> Dict[str, Any]:
+    """
+    Return correlation of a candidate with the current holdings and the effect of adding
+    it on portfolio volatility (see portfolio_fit). Kept apart from get_portfolio_context
+    because a cold price store makes it the slowest call of the stage.
+    """
+    holdings = _load_portfolio()
+    if not holdings:
+        return {"error": "No portfolio holdings"}
+    
+    fit = portfolio_fit({h["ticker"]: h["shares"] for h in holdings}, candidate)
+    if fit is None:
+        return {"error": f"Not enough price history to relate {candidate} to the holdings"}
+    return fit
+
+
 def execute_tool(tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Execute a tool by name"""
     tools = {
@@ -392,9 +435,75 @@ def execute_tool(tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         "get_price_history": get_price_history,
         "get_other": get_other,
         "get_portfolio_context": get_portfolio_context,
+        "get_portfolio_fit": get_portfolio_fit,
     }
     
     if tool_name not in tools:
         return {"error": f"Unknown tool: {tool_name}"}
     
     return tools[tool_name](**arguments)
+
+
+def execute_tools_concurrently(
+    calls: Dict[str, Tuple[str, Dict[str, Any]]],
+    timeout: Optional[float] = None,
+    timeouts: Optional[Dict[str, float]] = None,
+    required: Iterable[str] = (),
+    on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run independent tools in parallel and collect their results by key.
+    
+    Args:
+        calls: Mapping of result key to (tool_name, arguments)
+        timeout: Default per-tool timeout in seconds
+        timeouts: Per-key timeout overrides
+        required: Keys whose failure aborts the stage
+        on_result: Called with (key, result) as soon as each tool finishes
+        
+    Returns:
+        Mapping of result key to tool output. A tool that raises or exceeds its
+        timeout yields {"error": ...} so the rest of the report can still be written.
+    """
+    default_timeout = timeout if timeout is not None else settings.tool_timeout_seconds
+    started = time.monotonic()
+    
+    futures: Dict[Future, str] = {}
+    deadlines: Dict[str, float] = {}
+    for key, (tool_name, arguments) in calls.items():
+        futures[_tool_executor.submit(execute_tool, tool_name, arguments)] = key
+        deadlines[key] = started + (timeouts or {}).get(key, default_timeout)
+    
+    results: Dict[str, Dict[str, Any]] = {}
+    
+    def record(key: str, result: Dict[str, Any]):
+        results[key] = result
+        if on_result:
+            on_result(key, result)
+    
+    pending = set(futures)
+    while pending:
+        next_deadline = min(deadlines[futures[f]] for f in pending)
+        done, pending = wait(pending, timeout=max(0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        
+        for future in done:
+            key = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"error": str(e)}
+            record(key, result if isinstance(result, dict) else {"error": f"Invalid result from {calls[key][0]}"})
+        
+        now = time.monotonic()
+        for future in [f for f in pending if deadlines[futures[f]] <= now]:
+            key = futures[future]
+            future.cancel()
+            pending.discard(future)
+            record(key, {"error": f"{calls[key][0]} timed out after {deadlines[key] - started:.0f}s"})
+    
+    failed = [key for key in required if "error" in results.get(key, {"error": "missing"})]
+    if failed:
+        details = "; ".join(f"{key}: {results.get(key, {}).get('error', 'missing')}" for key in failed)
+        raise ToolExecutionError(f"Could not gather required data ({details})")
+    
+    return {key: results[key] for key in calls}
@@ -0,0 +1,162 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from app.analytics.risk import RISK_PERIOD, TRADING_DAYS, load_closes, simple_returns
+
+# Position sizes of the candidate for which the new portfolio volatility is reported
+CANDIDATE_WEIGHTS = (0.05, 0.10, 0.20)
+
+# Fewest common trading days for a meaningful covariance; shorter histories are left out
+MIN_OBSERVATIONS = 20
+
+# Holdings listed individually in the prompt table, largest weight first
+FIT_TABLE_ROWS = 15
+
+# Most correlated pairs of holdings named in the prompt table
+FIT_TABLE_PAIRS = 3
+
+
+def covariance_matrix(returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Annualized covariance and correlation of the columns of a complete (NaN-free) returns matrix"""
+    deviations = returns - returns.mean(axis=0)
+    covariance = deviations.T @ deviations / (len(returns) - 1) * TRADING_DAYS
+    volatility = np.sqrt(np.diag(covariance))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = covariance / np.outer(volatility, volatility)
+    return covariance, np.nan_to_num(correlation)
+
+
+def portfolio_fit(shares: Dict[str, float], candidate: str, period: str = RISK_PERIOD,
+                  candidate_weights: Sequence[float] = CANDIDATE_WEIGHTS) -> Optional[Dict[str, Any]]:
+    """
+    How a candidate ticker relates to the risk of the current holdings.
+
+    Holdings are weighted by their latest close x shares. From one returns matrix of the
+    holdings and the candidate on their common trading days this computes the covariance
+    and correlation matrices, each holding's marginal and total contribution to portfolio
+    volatility, and the portfolio volatility after buying the candidate at each of
+    candidate_weights (funded pro rata from the existing holdings).
+
+    Returns:
+        None if the candidate or every holding has too little price history
+    """
+    candidate = candidate.upper()
+    counts: Dict[str, float] = {}
+    for ticker, count in shares.items():
+        counts[ticker.upper()] = counts.get(ticker.upper(), 0) + count
+    held = list(counts)
+    symbols = list(dict.fromkeys(held + [candidate]))
+    _, closes = load_closes(symbols, period)
+    returns = simple_returns(closes)
+
+    usable = (~np.isnan(returns)).sum(axis=0) >= MIN_OBSERVATIONS
+    if not usable[symbols.index(candidate)]:
+        return None
+    columns = [i for i, t in enumerate(symbols) if usable[i]]
+    tickers = [symbols[i] for i in columns]
+    returns = returns[:, columns]
+    returns = returns[~np.isnan(returns).any(axis=1)]
+
+    holding_columns = [tickers.index(t) for t in held if t in tickers]
+    last = closes[-1, columns]
+    values = np.zeros(len(tickers))
+    values[holding_columns] = [counts[tickers[i]] * last[i] for i in holding_columns]
+    if len(returns) < MIN_OBSERVATIONS or not np.isfinite(values).all() or values.sum() <= 0:
+        return None
+
+    covariance, correlation = covariance_matrix(returns)
+    weights = values / values.sum()
+    exposure = covariance @ weights
+    portfolio_variance = float(weights @ exposure)
+    portfolio_vol = np.sqrt(portfolio_variance)
+    # Risk contributions are undefined for a portfolio whose returns never move
+    risky = portfolio_variance > 0
+    if risky:
+        marginal = exposure / portfolio_vol
+        contribution = weights * marginal / portfolio_vol
+
+    c = tickers.index(candidate)
+    candidate_vol = np.sqrt(covariance[c, c])
+    sizes = np.asarray(candidate_weights, dtype="f8")
+    # Variance of (1 - a) * portfolio + a * candidate for every size a at once
+    new_vol = np.sqrt(
+        (1 - sizes) ** 2 * portfolio_variance + 2 * sizes * (1 - sizes) * exposure[c] + sizes ** 2 * covariance[c, c]
+    )
+
+    upper = np.triu_indices(len(holding_columns), k=1)
+    pair_corr = correlation[np.ix_(holding_columns, holding_columns)][upper]
+    top_pairs = np.argsort(-pair_corr)[:FIT_TABLE_PAIRS]
+
+    return {
+        "candidate": candidate,
+        "period": period,
+        "observations": len(returns),
+        "portfolio_volatility_percent": round(portfolio_vol * 100, 2),
+        "candidate_volatility_percent": round(float(candidate_vol) * 100, 2),
+        "candidate_portfolio_correlation": (
+            round(float(exposure[c] / (portfolio_vol * candidate_vol)), 2) if risky and candidate_vol > 0 else None
+        ),
+        "candidate_beta_to_portfolio": round(float(exposure[c] / portfolio_variance), 2) if risky else None,
+        "holdings": [
+            {
+                "ticker": tickers[i],
+                "weight_percent": round(float(weights[i]) * 100, 2),
+                "volatility_percent": round(float(np.sqrt(covariance[i, i])) * 100, 2),
+                "marginal_risk_percent": round(float(marginal[i]) * 100, 2) if risky else None,
+                "risk_contribution_percent": round(float(contribution[i]) * 100, 2) if risky else None,
+                "correlation_with_candidate": round(float(correlation[i, c]), 2),
+            }
+            for i in sorted(holding_columns, key=lambda i: -weights[i])
+        ],
+        "additions": [
+            {
+                "weight_percent": round(float(size) * 100, 2),
+                "portfolio_volatility_percent": round(float(vol) * 100, 2),
+                "change_points": round(float(vol - portfolio_vol) * 100, 2),
+            }
+            for size, vol in zip(sizes, new_vol)
+        ],
+        "top_correlated_pairs": [
+            [tickers[holding_columns[upper[0][p]]], tickers[holding_columns[upper[1][p]]], round(float(pair_corr[p]), 2)]
+            for p in top_pairs
+        ],
+        "excluded": [t for t in held if t not in tickers],
+        "tickers": tickers,
+        "correlation_matrix": np.round(correlation, 2).tolist(),
+    }
+
+
+def format_fit_table(fit: Dict[str, Any]) -> str:
+    """Compact plain-text table of a portfolio_fit result for the PORTFOLIO_FIT prompt"""
+    candidate = fit["candidate"]
+    lines = [
+        f"Return correlation and risk ({fit['period']} of daily returns, {fit['observations']} common days, annualized):",
+        f"ticker weight% vol% risk_share% corr_{candidate}",
+    ]
+    holdings: List[Dict[str, Any]] = fit["holdings"]
+    for h in holdings[:FIT_TABLE_ROWS]:
+        lines.append(
+            f"{h['ticker']} {h['weight_percent']} {h['volatility_percent']} "
+            f"{h['risk_contribution_percent']} {h['correlation_with_candidate']}"
+        )
+    if len(holdings) > FIT_TABLE_ROWS:
+        rest = holdings[FIT_TABLE_ROWS:]
+        lines.append(
+            f"(+{len(rest)} more, {round(sum(h['weight_percent'] for h in rest), 2)}% weight, "
+            f"{round(sum(h['risk_contribution_percent'] or 0 for h in rest), 2)}% of risk)"
+        )
+    lines.append(
+        f"portfolio vol {fit['portfolio_volatility_percent']}% | {candidate} vol {fit['candidate_volatility_percent']}% | "
+        f"corr({candidate}, portfolio) {fit['candidate_portfolio_correlation']} | "
+        f"beta to portfolio {fit['candidate_beta_to_portfolio']}"
+    )
+    additions = fit["additions"]
+    if additions:
+        sizes = "/".join(f"{a['weight_percent']:g}%" for a in additions)
+        vols = "/".join(f"{a['portfolio_volatility_percent']}%" for a in additions)
+        changes = "/".join(f"{a['change_points']:+}" for a in additions)
+        lines.append(f"adding {candidate} at {sizes} -> portfolio vol {vols} ({changes} pts)")
+    if fit["top_correlated_pairs"]:
+        lines.append("most correlated holdings: " + ", ".join(f"{a}/{b} {c}" for a, b, c in fit["top_correlated_pairs"]))
+    if fit["excluded"]:
+        lines.append(f"no usable price history: {', '.join(fit['excluded'])}")
+    return "\n".join(lines)
@@ -0,0 +1,73 @@
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.analytics.risk import TRADING_DAYS, load_closes, rolling_volatility
+from app.utils.downsample import lttb
+
+# Trailing window of the rolling volatility series, in trading days
+HISTORY_VOLATILITY_WINDOW = 21
+
+
+def _series(values: np.ndarray, digits: int = 2) -> List[Optional[float]]:
+    return [None if v != v else v for v in np.round(values, digits).tolist()]
+
+
+def portfolio_history(shares: Dict[str, float], period: str = "1y",
+                      window: int = HISTORY_VOLATILITY_WINDOW,
+                      max_points: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Daily value of the current holdings over a past period, as if they had been held throughout.
+
+    The curve is the aligned closes matrix times the share counts. It starts on the first
+    day every holding with history has a price, so a later listing does not show up as a
+    jump; holdings without any history are listed under "excluded". Alongside the value
+    come the cumulative return, the drawdown from the running peak and the annualized
+    rolling volatility over window days. max_points downsamples every series at the
+    same LTTB-chosen days of the value curve.
+    """
+    tickers = list(shares)
+    dates, closes = load_closes(tickers, period)
+    counts = np.array([shares[t] for t in tickers], dtype="f8")
+
+    has_history = ~np.isnan(closes).all(axis=0) if len(closes) else np.zeros(len(tickers), dtype=bool)
+    excluded = [t for t, ok in zip(tickers, has_history) if not ok]
+    closes, counts = closes[:, has_history], counts[has_history]
+    complete = np.flatnonzero(~np.isnan(closes).any(axis=1)) if closes.shape[1] else np.empty(0, dtype=np.int64)
+    if len(complete) == 0:
+        return {
+            "period": period, "total_points": 0, "excluded": excluded, "series": None,
+            "error": "No price history for the holdings"
+        }
+
+    dates, closes = dates[complete[0]:], closes[complete[0]:]
+    values = closes @ counts
+    returns = np.concatenate([[0.0], values[1:] / values[:-1] - 1])
+    cumulative = values / values[0] - 1
+    drawdown = values / np.maximum.accumulate(values) - 1
+    volatility = np.full(len(values), np.nan)
+    if len(returns) > window:
+        volatility[window:] = rolling_volatility(returns[1:, None], window)[:, 0]
+
+    indices = np.arange(len(values))
+    if max_points and len(values) > max_points:
+        indices = lttb(dates.astype("int64"), values, max_points)
+
+    daily = returns[1:]
+    return {
+        "period": period,
+        "start_date": str(dates[0]),
+        "end_date": str(dates[-1]),
+        "start_value": round(float(values[0]), 2),
+        "end_value": round(float(values[-1]), 2),
+        "total_return_percent": round(float(cumulative[-1]) * 100, 2),
+        "max_drawdown_percent": round(float(-drawdown.min()) * 100, 2),
+        "volatility_percent": round(float(daily.std(ddof=1) * np.sqrt(TRADING_DAYS)) * 100, 2) if len(daily) > 1 else None,
+        "total_points": len(values),
+        "excluded": excluded,
+        "series": {
+            "dates": dates[indices].astype(str).tolist(),
+            "value": _series(values[indices]),
+            "return_percent": _series(cumulative[indices] * 100),
+            "drawdown_percent": _series(drawdown[indices] * 100),
+            "volatility_percent": _series(volatility[indices] * 100),
+        },
+    }
@@ -0,0 +1,335 @@
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from app.config.settings import get_settings
+from app.data.quotes import get_prices, get_quote_table
+
+settings = get_settings()
+
+DeltaSubscriber = Callable[[Dict[str, Any]], None]
+
+# Incremental totals are recomputed exactly after this many updates to bound rounding drift
+RESYNC_EVERY = 10000
+
+# Starting slot capacity; arrays double when full
+INITIAL_CAPACITY = 64
+
+
+class LiveValuation:
+    """
+    Portfolio valuation kept current by incremental updates.
+
+    Positions live in parallel arrays (shares, price, value, sector id) with one slot per
+    ticker. A price or share change adjusts that slot's value, the running total and its
+    sector's total in O(1), and every subscriber is handed a delta event with the new
+    figures. Other holdings' weights are not re-sent: each is its value over the delta's
+    total_value. Removing a position moves the last slot into the freed one.
+    """
+
+    def __init__(self, resync_every: int = RESYNC_EVERY):
+        self.resync_every = resync_every
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._subscribers: List[DeltaSubscriber] = []
+        self._reset(INITIAL_CAPACITY)
+
+    def _reset(self, capacity: int):
+        self._slots: Dict[str, int] = {}
+        self._tickers: List[str] = []
+        self._shares = np.zeros(capacity)
+        self._prices = np.zeros(capacity)
+        self._values = np.zeros(capacity)
+        self._sector_ids = np.zeros(capacity, dtype=np.int64)
+        self._sector_names: List[str] = []
+        self._sector_lookup: Dict[str, int] = {}
+        self._sector_values: List[float] = []
+        self.total_value = 0.0
+        self.version = 0
+        self._updates_since_resync = 0
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker.upper() in self._slots
+
+    def __len__(self) -> int:
+        return len(self._tickers)
+
+    def tickers(self) -> List[str]:
+        with self._lock:
+            return list(self._tickers)
+
+    def price(self, ticker: str) -> Optional[float]:
+        with self._lock:
+            slot = self._slots.get(ticker.upper())
+            return None if slot is None else float(self._prices[slot])
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def load(self, holdings: List[Dict[str, Any]]):
+        """Replace every position with holdings priced from one batch quote"""
+        quotes = get_quote_table([h["ticker"] for h in holdings]) if holdings else None
+        with self._lock:
+            self._reset(max(INITIAL_CAPACITY, len(holdings)))
+            for i, h in enumerate(holdings):
+                price = quotes.prices[i] if np.isfinite(quotes.prices[i]) else 0.0
+                self._insert(h["ticker"].upper(), float(h["shares"]), float(price),
+                             quotes.profiles[i].get("sector") or "Unknown")
+            self._resync()
+            self.loaded = True
+            self._publish({"step": "snapshot", **self._snapshot()})
+
+    def _sector_id(self, sector: str) -> int:
+        if sector not in self._sector_lookup:
+            self._sector_lookup[sector] = len(self._sector_names)
+            self._sector_names.append(sector)
+            self._sector_values.append(0.0)
+        return self._sector_lookup[sector]
+
+    def _insert(self, ticker: str, shares: float, price: float, sector: str) -> int:
+        slot = len(self._tickers)
+        if slot == len(self._shares):
+            for name in ("_shares", "_prices", "_values", "_sector_ids"):
+                array = getattr(self, name)
+                setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+        self._slots[ticker] = slot
+        self._tickers.append(ticker)
+        self._shares[slot] = shares
+        self._prices[slot] = price
+        self._values[slot] = 0.0
+        self._sector_ids[slot] = self._sector_id(sector)
+        return slot
+
+    def _resync(self):
+        """Recompute the running totals exactly from the arrays"""
+        n = len(self._tickers)
+        self._values[:n] = self._shares[:n] * self._prices[:n]
+        self.total_value = float(self._values[:n].sum())
+        self._sector_values = np.bincount(
+            self._sector_ids[:n], weights=self._values[:n], minlength=len(self._sector_names)
+        ).tolist()
+        self._updates_since_resync = 0
+
+    def _apply(self, slot: int, shares: float, price: float) -> Dict[str, Any]:
+        """Set one slot and adjust the running totals by the change in its value"""
+        value = shares * price
+        change = value - float(self._values[slot])
+        sector = int(self._sector_ids[slot])
+        self._shares[slot] = shares
+        self._prices[slot] = price
+        self._values[slot] = value
+        self.total_value += change
+        self._sector_values[sector] += change
+        self.version += 1
+        self._updates_since_resync += 1
+        if self._updates_since_resync >= self.resync_every:
+            self._resync()
+        return self._delta(slot)
+
+    def _weight(self, value: float) -> float:
+        return value / self.total_value * 100 if self.total_value > 0 else 0.0
+
+    def _delta(self, slot: int, removed: bool = False) -> Dict[str, Any]:
+        sector = int(self._sector_ids[slot])
+        return {
+            "step": "delta",
+            "version": self.version,
+            "ticker": self._tickers[slot],
+            "removed": removed,
+            "shares": float(self._shares[slot]),
+            "price": float(self._prices[slot]),
+            "value": float(self._values[slot]),
+            "weight": self._weight(float(self._values[slot])),
+            "sector": self._sector_names[sector],
+            "sector_value": self._sector_values[sector],
+            "sector_weight": self._weight(self._sector_values[sector]),
+            "total_value": self.total_value,
+        }
+
+    def set_price(self, ticker: str, price: float) -> Optional[Dict[str, Any]]:
+        """Update one price; returns the published delta, or None if the ticker is not held or unchanged"""
+        with self._lock:
+            slot = self._slots.get(ticker.upper())
+            if slot is None or price == self._prices[slot]:
+                return None
+            delta = self._apply(slot, float(self._shares[slot]), float(price))
+            self._publish(delta)
+        return delta
+
+    def set_position(self, ticker: str, shares: float, price: Optional[float] = None,
+                     sector: Optional[str] = None) -> Dict[str, Any]:
+        """Add a position or change its share count (and price, if given)"""
+        ticker = ticker.upper()
+        with self._lock:
+            slot = self._slots.get(ticker)
+            if slot is None:
+                slot = self._insert(ticker, 0.0, 0.0, sector or "Unknown")
+            price = float(self._prices[slot]) if price is None else float(price)
+            delta = self._apply(slot, float(shares), price)
+            self._publish(delta)
+        return delta
+
+    def remove(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Drop a position; the last slot is moved into its place"""
+        ticker = ticker.upper()
+        with self._lock:
+            slot = self._slots.get(ticker)
+            if slot is None:
+                return None
+            self._apply(slot, 0.0, float(self._prices[slot]))
+            delta = self._delta(slot, removed=True)
+
+            last = len(self._tickers) - 1
+            if slot != last:
+                moved = self._tickers[last]
+                for array in (self._shares, self._prices, self._values, self._sector_ids):
+                    array[slot] = array[last]
+                self._tickers[slot] = moved
+                self._slots[moved] = slot
+            self._tickers.pop()
+            del self._slots[ticker]
+            self._publish(delta)
+        return delta
+
+    def _snapshot(self) -> Dict[str, Any]:
+        n = len(self._tickers)
+        held_sectors = set(self._sector_ids[:n].tolist())
+        weights = self._values[:n] / self.total_value * 100 if self.total_value > 0 else np.zeros(n)
+        return {
+            "version": self.version,
+            "total_value": self.total_value,
+            "total_holdings": n,
+            "holdings": [
+                {
+                    "ticker": self._tickers[i],
+                    "shares": float(self._shares[i]),
+                    "price": float(self._prices[i]),
+                    "value": float(self._values[i]),
+                    "weight": float(weights[i]),
+                    "sector": self._sector_names[self._sector_ids[i]],
+                }
+                for i in range(n)
+            ],
+            "sectors": {
+                name: {"value": value, "weight": self._weight(value)}
+                for sector, (name, value) in enumerate(zip(self._sector_names, self._sector_values))
+                if sector in held_sectors
+            },
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Full current state; weights of every holding are computed here, not on updates"""
+        with self._lock:
+            return self._snapshot()
+
+    def _publish(self, event: Dict[str, Any]):
+        # Called with the lock held so subscribers see events in version order; they must not block
+        for subscriber in list(self._subscribers):
+            subscriber(event)
+
+    def subscribe(self, subscriber: DeltaSubscriber) -> Dict[str, Any]:
+        """Register for delta events. Returns the current snapshot, consistent with the deltas that follow."""
+        with self._lock:
+            self._subscribers.append(subscriber)
+            return self._snapshot()
+
+    def unsubscribe(self, subscriber: DeltaSubscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+
+class PriceFeed(ABC):
+    """
+    Background thread pushing prices into a LiveValuation while it has subscribers.
+    start() is idempotent and the thread exits once the last subscriber has gone.
+    """
+
+    def __init__(self, valuation: LiveValuation, interval: float):
+        self.valuation = valuation
+        self.interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                if not self.valuation.has_subscribers:
+                    self._thread = None
+                    return
+            try:
+                self.step()
+            except Exception:
+                # A failed poll is retried on the next interval
+                pass
+
+    @abstractmethod
+    def step(self):
+        """Push one round of prices into the valuation"""
+
+
+class QuoteFeed(PriceFeed):
+    """Polls batched quotes for every held ticker"""
+
+    def step(self):
+        for ticker, (price, _) in get_prices(self.valuation.tickers()).items():
+            self.valuation.set_price(ticker, price)
+
+
+class PriceTickSimulator(PriceFeed):
+    """
+    Stand-in for a live feed: each step moves a random subset of held prices by a
+    geometric Brownian motion increment. Seeded, and step() can be called directly,
+    so tests can drive it deterministically without starting the thread.
+    """
+
+    def __init__(self, valuation: LiveValuation, interval: float = 1.0,
+                 volatility: float = 0.3, tick_fraction: float = 0.25, seed: Optional[int] = None):
+        super().__init__(valuation, interval)
+        self.volatility = volatility
+        self.tick_fraction = tick_fraction
+        self._rng = np.random.default_rng(seed)
+
+    def step(self) -> List[Dict[str, Any]]:
+        tickers = self.valuation.tickers()
+        if not tickers:
+            return []
+        count = max(1, int(len(tickers) * self.tick_fraction))
+        chosen = self._rng.choice(len(tickers), size=min(count, len(tickers)), replace=False)
+        # Volatility is annual; one step is one interval of trading time
+        scale = self.volatility * np.sqrt(self.interval / (252 * 6.5 * 3600))
+        shocks = np.exp(self._rng.normal(-0.5 * scale ** 2, scale, len(chosen)))
+        deltas = []
+        for i, shock in zip(chosen, shocks):
+            price = self.valuation.price(tickers[i])
+            if price:
+                delta = self.valuation.set_price(tickers[i], round(price * float(shock), 4))
+                if delta:
+                    deltas.append(delta)
+        return deltas
+
+
+live_valuation = LiveValuation()
+
+
+def create_feed(valuation: LiveValuation = live_valuation) -> PriceFeed:
+    """The feed selected by the live_price_source setting ("quotes" or "simulated")"""
+    if settings.live_price_source == "simulated":
+        return PriceTickSimulator(valuation, interval=settings.live_tick_seconds)
+    return QuoteFeed(valuation, interval=settings.quote_ttl_seconds)
+
+
+live_feed = create_feed()
@@ -0,0 +1,252 @@
+from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from app.config.settings import get_settings
+from app.data.price_store import BAR_DTYPE, PERIOD_BARS, PERIOD_OFFSETS, price_store
+from app.data.snapshot import TickerSnapshot
+
+settings = get_settings()
+
+TRADING_DAYS = 252
+
+# Price history the metrics are computed over
+RISK_PERIOD = "1y"
+
+# Rolling volatility windows in trading days
+VOLATILITY_WINDOWS = {"1m": 21, "3m": 63, "6m": 126}
+
+# One-day loss not exceeded with this probability
+VAR_CONFIDENCE = 0.95
+
+# Metrics reported in percent; the rest are ratios
+PERCENT_METRICS = {
+    "annual_return", "annual_volatility", "max_drawdown", "var", "cvar", "parametric_var",
+    "parametric_cvar", "downside_deviation",
+} | {f"volatility_{label}" for label in VOLATILITY_WINDOWS}
+
+_loader = ThreadPoolExecutor(max_workers=settings.tool_max_workers, thread_name_prefix="risk-prices")
+
+
+def align_closes(bars_by_ticker: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Closes of several tickers on the union of their trading days.
+
+    Returns:
+        (dates, closes) where closes is a days x tickers matrix in the order of
+        bars_by_ticker. Gaps are carried forward; days before a ticker's first bar are NaN.
+    """
+    series = list(bars_by_ticker.values())
+    if not series:
+        return np.empty(0, dtype="datetime64[D]"), np.empty((0, 0))
+    dates = np.unique(np.concatenate([bars["date"] for bars in series]))
+    closes = np.full((len(dates), len(series)), np.nan)
+    for column, bars in enumerate(series):
+        closes[np.searchsorted(dates, bars["date"]), column] = bars["close"]
+
+    # Forward fill: index of the last observed row at or above each row
+    observed = np.where(np.isnan(closes), 0, np.arange(len(dates))[:, None])
+    np.maximum.accumulate(observed, axis=0, out=observed)
+    return dates, closes[observed, np.arange(len(series))]
+
+
+def load_closes(tickers: Sequence[str], period: str = RISK_PERIOD,
+                snapshots: Optional[Dict[str, TickerSnapshot]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Aligned closes from the price store, loaded concurrently; a ticker that fails is an all-NaN column"""
+    if period not in ("max", "ytd") and period not in PERIOD_BARS and period not in PERIOD_OFFSETS:
+        raise ValueError(f"Unsupported period '{period}'")
+    snapshots = snapshots or {}
+
+    def load(ticker: str) -> np.ndarray:
+        try:
+            return price_store.get_bars(ticker, period, snapshots.get(ticker))
+        except Exception:
+            return np.empty(0, dtype=BAR_DTYPE)
+
+    return align_closes(dict(enumerate(_loader.map(load, tickers))))
+
+
+def simple_returns(closes: np.ndarray) -> np.ndarray:
+    """Day-over-day returns of a days x tickers matrix; NaN where either day is missing"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return closes[1:] / closes[:-1] - 1
+
+
+def rolling_volatility(returns: np.ndarray, window: int) -> np.ndarray:
+    """
+    Annualized volatility over every trailing window of a returns matrix, via running
+    sums so the cost does not depend on the window length. Windows with fewer than
+    two observed returns are NaN.
+    """
+    valid = ~np.isnan(returns)
+    values = np.where(valid, returns, 0.0)
+    padding = np.zeros((1, returns.shape[1]))
+    sums = np.concatenate([padding, np.cumsum(values, axis=0)])
+    squares = np.concatenate([padding, np.cumsum(values * values, axis=0)])
+    counts = np.concatenate([padding, np.cumsum(valid, axis=0)])
+
+    n = counts[window:] - counts[:-window]
+    total = sums[window:] - sums[:-window]
+    total_sq = squares[window:] - squares[:-window]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = (total_sq - total * total / n) / (n - 1)
+    variance = np.where(n >= 2, np.maximum(variance, 0), np.nan)
+    return np.sqrt(variance * TRADING_DAYS)
+
+
+def compute_risk(closes: np.ndarray, benchmark: Optional[np.ndarray] = None,
+                 risk_free_rate: float = settings.risk_free_rate,
+                 confidence: float = VAR_CONFIDENCE) -> Dict[str, np.ndarray]:
+    """
+    Risk metrics for every column of a days x tickers closes matrix at once.
+
+    Volatilities, downside deviation and returns are annualized fractions; VaR and CVaR
+    are one-day losses as positive fractions; drawdown is the worst fall from a running
+    peak. Beta is against the benchmark closes aligned to the same days.
+
+    Returns:
+        Metric name -> array with one value per column (NaN where there is too little data)
+    """
+    if closes.shape[0] < 3:
+        # Too short for any metric: pad with missing days so everything comes out NaN
+        closes = np.vstack([np.full((3 - closes.shape[0], closes.shape[1]), np.nan), closes])
+    returns = simple_returns(closes)
+    valid = ~np.isnan(returns)
+    n = valid.sum(axis=0)
+    values = np.where(valid, returns, 0.0)
+    rf_daily = risk_free_rate / TRADING_DAYS
+    alpha = 1 - confidence
+    enough = n >= 2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = values.sum(axis=0) / n
+        deviations = np.where(valid, returns - mean, 0.0)
+        std = np.sqrt((deviations * deviations).sum(axis=0) / (n - 1))
+
+        metrics = {
+            "annual_return": mean * TRADING_DAYS,
+            "annual_volatility": std * np.sqrt(TRADING_DAYS),
+        }
+        for label, window in VOLATILITY_WINDOWS.items():
+            if len(returns) >= window:
+                metrics[f"volatility_{label}"] = rolling_volatility(returns[-window:], window)[-1]
+            else:
+                metrics[f"volatility_{label}"] = np.full(closes.shape[1], np.nan)
+
+        # Worst fall from the running peak; fmax skips the NaNs before a ticker's first close
+        peaks = np.fmax.accumulate(closes, axis=0)
+        drawdowns = np.where(np.isnan(closes), 0.0, closes / peaks - 1)
+        metrics["max_drawdown"] = -drawdowns.min(axis=0)
+
+        # Historical VaR/CVaR from the sorted returns (NaNs sort last and are never reached)
+        ordered = np.sort(returns, axis=0)
+        position = alpha * (n - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, np.maximum(n - 1, 0))
+        low_values = np.take_along_axis(ordered, lower[None, :], axis=0)[0]
+        high_values = np.take_along_axis(ordered, upper[None, :], axis=0)[0]
+        metrics["var"] = -(low_values + (position - lower) * (high_values - low_values))
+        tail = np.maximum(np.ceil(alpha * n).astype(np.int64), 1)
+        tail_sums = np.cumsum(np.where(np.isnan(ordered), 0.0, ordered), axis=0)
+        metrics["cvar"] = -np.take_along_axis(tail_sums, (tail - 1)[None, :], axis=0)[0] / tail
+
+        # Parametric (normal) VaR/CVaR from the daily mean and standard deviation
+        z = NormalDist().inv_cdf(alpha)
+        metrics["parametric_var"] = -(mean + z * std)
+        metrics["parametric_cvar"] = -(mean - std * NormalDist().pdf(z) / alpha)
+
+        shortfall = np.minimum(values - rf_daily, 0.0) * valid
+        downside = np.sqrt((shortfall * shortfall).sum(axis=0) / n)
+        metrics["downside_deviation"] = downside * np.sqrt(TRADING_DAYS)
+        metrics["sharpe_ratio"] = (mean - rf_daily) / std * np.sqrt(TRADING_DAYS)
+        metrics["sortino_ratio"] = (mean - rf_daily) / downside * np.sqrt(TRADING_DAYS)
+
+        if benchmark is not None:
+            market = simple_returns(benchmark.reshape(-1, 1))[:, 0]
+            paired = valid & ~np.isnan(market)[:, None]
+            pair_n = paired.sum(axis=0)
+            asset = np.where(paired, returns, 0.0)
+            market_m = np.where(paired, market[:, None], 0.0)
+            asset_dev = np.where(paired, asset - asset.sum(axis=0) / pair_n, 0.0)
+            market_dev = np.where(paired, market_m - market_m.sum(axis=0) / pair_n, 0.0)
+            covariance = (asset_dev * market_dev).sum(axis=0)
+            market_var = (market_dev * market_dev).sum(axis=0)
+            metrics["beta"] = np.where(pair_n >= 2, covariance / market_var, np.nan)
+            metrics["correlation"] = np.where(
+                pair_n >= 2,
+                covariance / np.sqrt(market_var * (asset_dev * asset_dev).sum(axis=0)),
+                np.nan
+            )
+
+    return {name: np.where(enough, value, np.nan) for name, value in metrics.items()}
+
+
+def _metric_value(value: float, percent: bool) -> Optional[float]:
+    if not np.isfinite(value):
+        return None
+    return round(float(value) * 100, 2) if percent else round(float(value), 2)
+
+
+def _column_metrics(metrics: Dict[str, np.ndarray], column: int) -> Dict[str, Optional[float]]:
+    return {
+        (f"{name}_percent" if name in PERCENT_METRICS else name): _metric_value(values[column], name in PERCENT_METRICS)
+        for name, values in metrics.items()
+    }
+
+
+def _with_benchmark(tickers: Sequence[str], benchmark: Optional[str]) -> List[str]:
+    return list(dict.fromkeys([t.upper() for t in tickers] + ([benchmark.upper()] if benchmark else [])))
+
+
+def _benchmark_column(closes: np.ndarray, symbols: List[str], benchmark: Optional[str]) -> Optional[np.ndarray]:
+    if not benchmark:
+        return None
+    market = closes[:, symbols.index(benchmark.upper())]
+    return None if np.isnan(market).all() else market
+
+
+def risk_metrics(tickers: Sequence[str], period: str = RISK_PERIOD,
+                 benchmark: Optional[str] = settings.risk_benchmark,
+                 snapshots: Optional[Dict[str, TickerSnapshot]] = None) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Risk metrics for many tickers from one aligned closes matrix and one compute_risk call.
+
+    Returns:
+        Ticker -> metric -> value, with "_percent" appended to percentage metrics and
+        None where a ticker has too little history
+    """
+    symbols = _with_benchmark(tickers, benchmark)
+    _, closes = load_closes(symbols, period, snapshots)
+    metrics = compute_risk(closes, _benchmark_column(closes, symbols, benchmark))
+    return {t.upper(): _column_metrics(metrics, symbols.index(t.upper())) for t in tickers}
+
+
+def portfolio_risk(shares: Dict[str, float], period: str = RISK_PERIOD,
+                   benchmark: Optional[str] = settings.risk_benchmark) -> Dict[str, Any]:
+    """
+    Risk metrics for each holding and for the portfolio as a whole. The portfolio is
+    one more column of the same matrix, its daily value as closes x shares, so the
+    whole book is still a single compute_risk call.
+
+    Holdings without any price history are left out of the portfolio and listed under
+    "excluded"; the value curve starts on the first day every other holding has a price.
+    """
+    tickers = [t.upper() for t in shares]
+    symbols = _with_benchmark(tickers, benchmark)
+    _, closes = load_closes(symbols, period)
+    held = closes[:, [symbols.index(t) for t in tickers]]
+    counts = np.array([shares[t] for t in shares], dtype="f8")
+
+    has_history = ~np.isnan(held).all(axis=0) if len(held) else np.zeros(len(tickers), dtype=bool)
+    held, counts = held[:, has_history], counts[has_history]
+    value = np.full(len(closes), np.nan)
+    complete = np.flatnonzero(~np.isnan(held).any(axis=1)) if held.shape[1] else np.empty(0, dtype=np.int64)
+    if len(complete):
+        value[complete[0]:] = held[complete[0]:] @ counts
+
+    metrics = compute_risk(np.column_stack([closes, value]), _benchmark_column(closes, symbols, benchmark))
+    return {
+        "holdings": {t: _column_metrics(metrics, symbols.index(t)) for t in tickers},
+        "portfolio": _column_metrics(metrics, len(symbols)),
+        "excluded": [t for t, ok in zip(tickers, has_history) if not ok],
+    }
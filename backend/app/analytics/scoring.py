@@ -0,0 +1,225 @@
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.analytics.covariance import MIN_OBSERVATIONS, covariance_matrix
+from app.analytics.risk import RISK_PERIOD, compute_risk, load_closes, simple_returns
+from app.analytics.valuation import value_holdings
+from app.agents.prompts import get_portfolio_rating_prompt
+from app.config.settings import get_settings
+from app.utils.llm import call_chat
+from app.utils.packer import pack_value
+
+settings = get_settings()
+
+# (best, worst) of each measure; values in between score linearly from 100 down to 0
+PE_RANGE = (12.0, 40.0)
+VOLATILITY_RANGE = (0.15, 0.60)
+DRAWDOWN_RANGE = (0.10, 0.50)
+MOMENTUM_RANGE = (0.30, -0.30)
+POSITION_WEIGHT_RANGE = (0.05, 0.25)
+CORRELATION_RANGE = (0.20, 0.80)
+HHI_RANGE = (0.05, 0.50)
+SECTOR_HHI_RANGE = (0.15, 0.60)
+
+# Trading days back for the momentum returns; the latest month is skipped as short-term noise
+MOMENTUM_LOOKBACKS = (63, 126, 252)
+MOMENTUM_SKIP = 21
+
+CATEGORIES = ("diversification", "concentration", "valuation", "risk", "momentum")
+
+# Lowest overall score for each letter rating, best first
+RATING_BANDS = ((80, "A"), (65, "B"), (50, "C"), (35, "D"), (0, "F"))
+
+
+def scale_score(values: np.ndarray, best: float, worst: float) -> np.ndarray:
+    """Map values onto 0-100, 100 at best or beyond and 0 at worst or beyond; NaN stays NaN"""
+    with np.errstate(invalid="ignore"):
+        return np.clip((np.asarray(values, dtype="f8") - worst) / (best - worst), 0, 1) * 100
+
+
+def rating(score: Optional[float]) -> Optional[str]:
+    if score is None:
+        return None
+    return next(letter for floor, letter in RATING_BANDS if score >= floor)
+
+
+def _nanmean(values: np.ndarray, axis: int) -> np.ndarray:
+    """Mean over the non-NaN entries along axis; NaN where there are none"""
+    available = ~np.isnan(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(available, values, 0).sum(axis=axis) / available.sum(axis=axis)
+
+
+def _value(value: float, digits: int = 1) -> Optional[float]:
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+def _momentum(closes: np.ndarray) -> np.ndarray:
+    """Mean of the 3, 6 and 12 month returns up to a month ago, per column, over the lookbacks available"""
+    end = len(closes) - 1 - MOMENTUM_SKIP
+    if end < 1:
+        return np.full(closes.shape[1], np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.stack([
+            closes[end] / closes[max(end - lookback, 0)] - 1 for lookback in MOMENTUM_LOOKBACKS
+        ])
+    return _nanmean(np.where(np.isfinite(returns), returns, np.nan), axis=0)
+
+
+def score_portfolio(holdings: List[Dict[str, Any]], period: str = RISK_PERIOD) -> Dict[str, Any]:
+    """
+    Rate every holding and the portfolio on diversification, concentration, valuation,
+    risk and momentum, each 0-100 (higher is better), plus an overall score and letter.
+
+    One batch quote gives weights, sectors and P/E; one aligned closes matrix (holdings
+    plus the portfolio value curve) gives volatility, drawdown, momentum and the
+    correlation matrix. Every category is computed for all holdings at once.
+    """
+    if not holdings:
+        return {"portfolio": None, "holdings": []}
+
+    valuation = value_holdings(holdings)
+    tickers = [h["ticker"].upper() for h in valuation["holdings"]]
+    weights = np.array([h["weight"] for h in valuation["holdings"]], dtype="f8") / 100
+    values = np.array([h["value"] for h in valuation["holdings"]], dtype="f8")
+    pe = np.array([h["pe_ratio"] if h["pe_ratio"] is not None else np.nan for h in valuation["holdings"]], dtype="f8")
+    shares = np.array([h["shares"] for h in valuation["holdings"]], dtype="f8")
+
+    _, closes = load_closes(tickers, period)
+    # The portfolio's own value curve is one more column, so its risk comes out of the same pass.
+    # Holdings listed during the period count at their first close before it; those without
+    # any history are left out of the curve.
+    has_history = ~np.isnan(closes).all(axis=0) if len(closes) else np.zeros(len(tickers), dtype=bool)
+    first_close = closes[np.argmax(~np.isnan(closes), axis=0), np.arange(len(tickers))] if len(closes) else closes[0:0]
+    backfilled = np.where(np.isnan(closes), first_close, closes)
+    portfolio_curve = backfilled[:, has_history] @ shares[has_history]
+    risk = compute_risk(np.column_stack([closes, portfolio_curve]))
+    momentum = _momentum(np.column_stack([closes, portfolio_curve]))
+
+    # Pairwise correlation on the days every holding with enough history traded
+    returns = simple_returns(closes)
+    usable = (~np.isnan(returns)).sum(axis=0) >= MIN_OBSERVATIONS
+    complete = returns[:, usable]
+    complete = complete[~np.isnan(complete).any(axis=1)]
+    avg_correlation = np.full(len(tickers), np.nan)
+    portfolio_correlation = np.nan
+    diversification_ratio = np.nan
+    if usable.sum() > 1 and len(complete) > 2:
+        covariance, correlation = covariance_matrix(complete)
+        k = len(correlation)
+        avg_correlation[usable] = (correlation.sum(axis=1) - 1) / (k - 1)
+        w = weights[usable] / weights[usable].sum() if weights[usable].sum() > 0 else np.full(k, 1 / k)
+        off_diagonal = w @ correlation @ w - w @ w
+        portfolio_correlation = off_diagonal / (1 - w @ w) if w @ w < 1 else np.nan
+        diversification_ratio = (w @ np.sqrt(np.diag(covariance))) / np.sqrt(w @ covariance @ w)
+
+    # Holding scores: one column per category
+    holding_scores = np.column_stack([
+        scale_score(avg_correlation, *CORRELATION_RANGE),
+        # Unpriced holdings have no meaningful weight
+        np.where(values > 0, scale_score(weights, *POSITION_WEIGHT_RANGE), np.nan),
+        np.where(pe > 0, scale_score(pe, *PE_RANGE), np.nan),
+        _nanmean(np.stack([
+            scale_score(risk["annual_volatility"][:-1], *VOLATILITY_RANGE),
+            scale_score(risk["max_drawdown"][:-1], *DRAWDOWN_RANGE),
+        ]), axis=0),
+        scale_score(momentum[:-1], *MOMENTUM_RANGE),
+    ])
+    holding_overall = _nanmean(holding_scores, axis=1)
+
+    # Portfolio scores
+    hhi = float(weights @ weights)
+    sector_weights = np.array([s["weight"] for s in valuation["sectors"].values()], dtype="f8") / 100
+    sector_hhi = float(sector_weights @ sector_weights)
+    earnings = np.where(pe > 0, values / pe, 0.0)
+    portfolio_pe = values[pe > 0].sum() / earnings.sum() if earnings.sum() > 0 else np.nan
+    # Weight-based scores mean nothing when no holding could be priced
+    priced = valuation["total_value"] > 0
+    diversification = _nanmean(np.array([
+        scale_score(sector_hhi, *SECTOR_HHI_RANGE) if priced else np.nan,
+        scale_score(portfolio_correlation, *CORRELATION_RANGE),
+    ]), axis=0)
+    portfolio_scores = np.array([[
+        float(diversification),
+        float(scale_score(hhi, *HHI_RANGE)) if priced else np.nan,
+        float(scale_score(portfolio_pe, *PE_RANGE)),
+        float(_nanmean(np.array([
+            scale_score(risk["annual_volatility"][-1], *VOLATILITY_RANGE),
+            scale_score(risk["max_drawdown"][-1], *DRAWDOWN_RANGE),
+        ]), axis=0)),
+        float(scale_score(momentum[-1], *MOMENTUM_RANGE)),
+    ]])
+    portfolio_overall = float(_nanmean(portfolio_scores, axis=1)[0])
+
+    def scores_dict(row: np.ndarray) -> Dict[str, Optional[float]]:
+        return {category: _value(row[j]) for j, category in enumerate(CATEGORIES)}
+
+    rated_holdings = []
+    for i, h in enumerate(valuation["holdings"]):
+        overall = _value(holding_overall[i])
+        rated_holdings.append({
+            "ticker": tickers[i],
+            "company_name": h.get("company_name", tickers[i]),
+            "sector": h["sector"],
+            "weight": _value(weights[i] * 100, 2),
+            "scores": scores_dict(holding_scores[i]),
+            "overall": overall,
+            "rating": rating(overall),
+            "metrics": {
+                "pe_ratio": h["pe_ratio"],
+                "volatility_percent": _value(risk["annual_volatility"][i] * 100, 2),
+                "max_drawdown_percent": _value(risk["max_drawdown"][i] * 100, 2),
+                "momentum_percent": _value(momentum[i] * 100, 2),
+                "average_correlation": _value(avg_correlation[i], 2),
+            },
+        })
+
+    overall = _value(portfolio_overall)
+    return {
+        "portfolio": {
+            "scores": scores_dict(portfolio_scores[0]),
+            "overall": overall,
+            "rating": rating(overall),
+            "metrics": {
+                "total_value": round(valuation["total_value"], 2),
+                "total_holdings": len(tickers),
+                "hhi": round(hhi, 4),
+                "effective_holdings": _value(1 / hhi if hhi > 0 else np.nan, 2),
+                "sector_hhi": round(sector_hhi, 4),
+                "sector_weights": {name: round(s["weight"], 2) for name, s in valuation["sectors"].items()},
+                "pe_ratio": _value(portfolio_pe, 2),
+                "average_correlation": _value(portfolio_correlation, 2),
+                "diversification_ratio": _value(diversification_ratio, 2),
+                "volatility_percent": _value(risk["annual_volatility"][-1] * 100, 2),
+                "max_drawdown_percent": _value(risk["max_drawdown"][-1] * 100, 2),
+                "momentum_percent": _value(momentum[-1] * 100, 2),
+            },
+        },
+        "holdings": sorted(rated_holdings, key=lambda h: -(h["weight"] or 0)),
+    }
+
+
+def generate_rating_narrative(ratings: Dict[str, Any], use_cache: bool = True) -> Optional[str]:
+    """
+    One completion explaining a score_portfolio result. The model sees the portfolio
+    scores and metrics and each holding's scores, packed to the portfolio token budget,
+    rather than being called once per holding. Returns None if the call fails.
+    """
+    if not ratings.get("portfolio"):
+        return None
+    summary = {
+        "portfolio": ratings["portfolio"],
+        "holdings": [
+            {key: h[key] for key in ("ticker", "sector", "weight", "overall", "rating", "scores")}
+            for h in ratings["holdings"]
+        ],
+    }
+    system, prompt = get_portfolio_rating_prompt(pack_value(summary, settings.portfolio_token_budget))
+    try:
+        return call_chat(
+            messages=[{"role": "system", "content": system}, {"role": "user", "content": prompt}],
+            max_tokens=900,
+            temperature=0.5,
+            use_cache=use_cache
+        ).strip()
+    except Exception:
+        return None
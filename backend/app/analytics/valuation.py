@@ -0,0 +1,67 @@
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.data.quotes import QuoteTable, get_quote_table
+
+
+def _optional(value: float, digits: int = 2) -> Optional[float]:
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+def value_holdings(holdings: List[Dict[str, Any]], quotes: Optional[QuoteTable] = None) -> Dict[str, Any]:
+    """
+    Value, weight and sector breakdown of holdings from one batch of quotes.
+
+    Values, weights, P/E and sector totals are computed over arrays; a holding without
+    a price is valued at 0. Each returned holding keeps its stored fields and gains
+    current_price, value, weight (percent), sector, industry, pe_ratio, dividend_yield
+    and beta.
+    """
+    if not holdings:
+        return {"holdings": [], "total_value": 0, "total_holdings": 0, "sectors": {}}
+
+    quotes = quotes or get_quote_table([h["ticker"] for h in holdings])
+    shares = np.array([h["shares"] for h in holdings], dtype="f8")
+    prices = np.nan_to_num(quotes.prices)
+    values = shares * prices
+    total_value = float(values.sum())
+    weights = values / total_value * 100 if total_value > 0 else np.zeros(len(values))
+
+    eps = quotes.column("trailing_eps")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pe_ratios = np.where((eps > 0) & (prices > 0), prices / eps, np.nan)
+    dividend_yields = quotes.column("dividend_yield")
+    betas = quotes.column("beta")
+
+    sectors = [p.get("sector") or "Unknown" for p in quotes.profiles]
+    sector_names, sector_index = np.unique(sectors, return_inverse=True)
+    sector_values = np.bincount(sector_index, weights=values, minlength=len(sector_names))
+    sector_weights = sector_values / total_value * 100 if total_value > 0 else np.zeros(len(sector_names))
+
+    enriched = [
+        {
+            **h,
+            "current_price": float(prices[i]),
+            "value": float(values[i]),
+            "weight": float(weights[i]),
+            "sector": sectors[i],
+            "industry": quotes.profiles[i].get("industry") or "Unknown",
+            "pe_ratio": _optional(pe_ratios[i]),
+            "dividend_yield": _optional(dividend_yields[i], 4),
+            "beta": _optional(betas[i]),
+        }
+        for i, h in enumerate(holdings)
+    ]
+
+    return {
+        "holdings": enriched,
+        "total_value": total_value,
+        "total_holdings": len(enriched),
+        "sectors": {
+            str(name): {
+                "value": float(sector_values[j]),
+                "weight": float(sector_weights[j]),
+                "tickers": [h["ticker"] for h, s in zip(holdings, sector_index) if s == j],
+            }
+            for j, name in enumerate(sector_names)
+        },
+    }
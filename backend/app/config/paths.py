@@ -0,0 +1,12 @@
+import os
+
+# Detect if running in serverless environment (Vercel)
+IS_SERVERLESS = os.environ.get("VERCEL") or os.environ.get("AWS_LAMBDA_FUNCTION_NAME")
+
+# Get the absolute path to the data directory
+if IS_SERVERLESS:
+    # Use /tmp for serverless environments (only writable directory)
+    DATA_DIR = "/tmp/data"
+else:
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    DATA_DIR = os.path.join(BASE_DIR, "data")
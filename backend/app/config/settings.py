@@ -7,6 +7,36 @@ class Settings(BaseSettings):
     openai_api_key: str = ""
     backend_host: str = "0.0.0.0"
     backend_port: int = 8000
+    storage_backend: str = "file"
+    database_url: str = ""
+    snapshot_ttl_seconds: int = 300
+    snapshot_cache_size: int = 128
+    quote_ttl_seconds: int = 60
+    quote_cache_size: int = 1024
+    profile_cache_ttl_seconds: int = 86400
+    live_price_source: str = "quotes"
+    live_tick_seconds: float = 1.0
+    price_refresh_seconds: int = 900
+    price_pyramid_cache_size: int = 64
+    risk_benchmark: str = "SPY"
+    risk_free_rate: float = 0.04
+    tool_timeout_seconds: float = 20
+    portfolio_fit_timeout_seconds: float = 45
+    tool_max_workers: int = 16
+    llm_max_concurrency: int = 8
+    llm_cache_enabled: bool = True
+    llm_cache_ttl_seconds: int = 86400
+    llm_cache_max_entries: int = 5000
+    resolution_cache_ttl_seconds: int = 604800
+    resolution_negative_ttl_seconds: int = 600
+    analysis_token_budget: int = 3000
+    portfolio_token_budget: int = 800
+    analysis_mode: str = "single"
+    section_token_budget: int = 1200
+    research_workers: int = 4
+    research_queue_size: int = 32
+    research_job_history: int = 1000
+    pdf_workers: int = 2
     
     class Config:
         env_file = ".env"
@@ -1,5 +1,7 @@
 import yfinance as yf
+import pandas as pd
 from typing import Dict, Any, Optional
+from app.data.price_store import price_store
 from datetime import datetime, timedelta
 
 
@@ -150,12 +152,16 @@ def get_historical_data(ticker: str, period: str = "1y") -> Dict[str, Any]:
         Dictionary with historical data
     """
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period=period)
+        bars = price_store.get_bars(ticker, period)
         
-        if hist.empty:
+        if len(bars) == 0:
             return {"error": "No historical data available"}
         
+        hist = pd.DataFrame(
+            {"Open": bars["open"], "High": bars["high"], "Low": bars["low"], "Close": bars["close"], "Volume": bars["volume"]},
+            index=pd.DatetimeIndex(bars["date"], name="Date")
+        )
+        
         return {
             "data": hist.to_dict(),
             "period": period,
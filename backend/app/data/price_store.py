@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from app.config.settings import get_settings
+from app.data.snapshot import TickerSnapshot, get_snapshot
+from app.config.paths import DATA_DIR
+
+settings = get_settings()
+
+PRICES_DIR = os.path.join(DATA_DIR, "prices")
+
+# One record per trading day, adjusted for splits and dividends as Yahoo serves it
+BAR_DTYPE = np.dtype([
+    ("date", "datetime64[D]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "i8"),
+])
+
+# Window downloaded the first time a ticker is seen; full history is fetched only when "max" is asked for
+INITIAL_PERIOD = "10y"
+
+# Relative change on an already stored close that means Yahoo has re-adjusted the history
+ADJUSTMENT_TOLERANCE = 1e-6
+
+# Periods counted in trading days rather than calendar time
+PERIOD_BARS = {"1d": 1, "5d": 5}
+
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+
+def frame_to_bars(hist: pd.DataFrame) -> np.ndarray:
+    """Convert a yfinance history frame to BAR_DTYPE records, dropping rows without a close"""
+    if hist is None or hist.empty:
+        return np.empty(0, dtype=BAR_DTYPE)
+    hist = hist[hist["Close"].notna()]
+    index = hist.index.tz_localize(None) if getattr(hist.index, "tz", None) is not None else hist.index
+    bars = np.empty(len(hist), dtype=BAR_DTYPE)
+    bars["date"] = index.values.astype("datetime64[D]")
+    bars["open"] = hist["Open"].to_numpy(dtype="f8")
+    bars["high"] = hist["High"].to_numpy(dtype="f8")
+    bars["low"] = hist["Low"].to_numpy(dtype="f8")
+    bars["close"] = hist["Close"].to_numpy(dtype="f8")
+    bars["volume"] = hist["Volume"].fillna(0).to_numpy(dtype="i8")
+    return bars
+
+
+def slice_period(bars: np.ndarray, period: str) -> np.ndarray:
+    """The bars a yfinance period string covers, counted back from today"""
+    if period == "max" or len(bars) == 0:
+        return bars
+    if period in PERIOD_BARS:
+        return bars[-PERIOD_BARS[period]:]
+    today = pd.Timestamp.today().normalize()
+    if period == "ytd":
+        start = pd.Timestamp(year=today.year, month=1, day=1)
+    elif period in PERIOD_OFFSETS:
+        start = today - PERIOD_OFFSETS[period]
+    else:
+        raise ValueError(f"Unsupported period '{period}'")
+    return bars[np.searchsorted(bars["date"], np.datetime64(start.date(), "D"), side="left"):]
+
+
+class PriceStore:
+    """
+    Local store of daily OHLCV bars, one compact .npy file of BAR_DTYPE records per ticker
+    with a small JSON sidecar recording when it was last refreshed.
+
+    The first request downloads INITIAL_PERIOD (or the full history for "max"). Later
+    requests within refresh_seconds are served from memory or the memory-mapped file;
+    after that only the bars since the last stored day are downloaded and appended.
+    The second-to-last stored bar is downloaded again as an anchor: if its close has
+    changed, Yahoo has re-adjusted the series for a split or dividend and the whole
+    window is downloaded afresh. The last bar is always replaced, since it may have
+    been an unfinished trading day.
+    """
+
+    def __init__(self, directory: str, refresh_seconds: float):
+        self.directory = directory
+        self.refresh_seconds = refresh_seconds
+        self._series: Dict[str, Tuple[np.ndarray, Dict[str, Any]]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _lock_for(self, ticker: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _paths(self, ticker: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, ticker)
+        return f"{base}.npy", f"{base}.json"
+
+    def _read(self, ticker: str) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+        bars_path, meta_path = self._paths(ticker)
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            bars = np.load(bars_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if bars.dtype != BAR_DTYPE:
+            return None
+        return bars, meta
+
+    def _write(self, ticker: str, bars: np.ndarray, meta: Dict[str, Any]):
+        bars_path, meta_path = self._paths(ticker)
+        for path, write in (
+            (bars_path, lambda f: np.save(f, np.ascontiguousarray(bars))),
+            (meta_path, lambda f: f.write(json.dumps(meta).encode("utf-8"))),
+        ):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+
+    def _download(self, snapshot: TickerSnapshot, full_history: bool) -> Tuple[np.ndarray, Dict[str, Any]]:
+        hist = snapshot.stock.history(period="max" if full_history else INITIAL_PERIOD, interval="1d")
+        bars = frame_to_bars(hist)
+        meta = {"fetched_at": time.time(), "full_history": full_history}
+        if len(bars):
+            self._write(snapshot.ticker, bars, meta)
+        return bars, meta
+
+    def _update(self, snapshot: TickerSnapshot, bars: np.ndarray,
+                meta: Dict[str, Any]) -> Tuple[np.ndarray, Dict[str, Any]]:
+        if len(bars) < 2:
+            return self._download(snapshot, meta.get("full_history", False))
+
+        anchor = bars[-2]
+        recent = frame_to_bars(snapshot.stock.history(start=str(anchor["date"]), interval="1d"))
+        matches = recent[recent["date"] == anchor["date"]]
+        if len(matches) == 0 or abs(matches[0]["close"] - anchor["close"]) > ADJUSTMENT_TOLERANCE * abs(anchor["close"]):
+            return self._download(snapshot, meta.get("full_history", False))
+
+        merged = np.concatenate([bars[bars["date"] <= anchor["date"]], recent[recent["date"] > anchor["date"]]])
+        meta = {**meta, "fetched_at": time.time()}
+        self._write(snapshot.ticker, merged, meta)
+        return merged, meta
+
+    def get_bars(self, ticker: str, period: str = "1y", snapshot: Optional[TickerSnapshot] = None) -> np.ndarray:
+        """Daily bars for a yfinance period string, downloading only what is missing or stale"""
+        ticker = ticker.upper()
+        with self._lock_for(ticker):
+            bars, meta = self._series.get(ticker) or self._read(ticker) or (None, None)
+            snapshot = snapshot or get_snapshot(ticker)
+
+            if bars is None or (period == "max" and not meta.get("full_history")):
+                bars, meta = self._download(snapshot, period == "max")
+            elif time.time() - meta["fetched_at"] > self.refresh_seconds:
+                # Another process may already have refreshed the file
+                stored = self._read(ticker)
+                if stored and stored[1]["fetched_at"] > meta["fetched_at"]:
+                    bars, meta = stored
+                if time.time() - meta["fetched_at"] > self.refresh_seconds:
+                    try:
+                        bars, meta = self._update(snapshot, bars, meta)
+                    except Exception:
+                        # Serve the stored series if Yahoo is unreachable; retry on the next request
+                        pass
+
+            if len(bars):
+                self._series[ticker] = (bars, meta)
+        return slice_period(bars, period)
+
+    def invalidate(self, ticker: str):
+        ticker = ticker.upper()
+        with self._lock_for(ticker):
+            self._series.pop(ticker, None)
+            for path in self._paths(ticker):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+price_store = PriceStore(PRICES_DIR, refresh_seconds=settings.price_refresh_seconds)
@@ -0,0 +1,156 @@
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import yfinance as yf
+from app.config.settings import get_settings
+from app.data.snapshot import get_snapshot
+from app.config.paths import DATA_DIR
+from app.utils.cache import PersistentCache, TTLCache
+
+settings = get_settings()
+
+# Slow-moving .info fields kept per ticker so a batch quote only has to download prices
+PROFILE_FIELDS = {
+    "name": "longName",
+    "sector": "sector",
+    "industry": "industry",
+    "trailing_eps": "trailingEps",
+    "dividend_yield": "dividendYield",
+    "beta": "beta",
+}
+
+# ticker -> (price, previous close)
+_prices: TTLCache[Tuple[float, float]] = TTLCache(
+    max_size=settings.quote_cache_size,
+    ttl_seconds=settings.quote_ttl_seconds
+)
+
+profile_cache = PersistentCache(
+    os.path.join(DATA_DIR, "profile_cache.sqlite3"),
+    table="profiles",
+    ttl_seconds=settings.profile_cache_ttl_seconds
+)
+
+_profile_executor = ThreadPoolExecutor(max_workers=settings.tool_max_workers, thread_name_prefix="profile")
+
+
+@dataclass
+class QuoteTable:
+    """Quotes for many tickers as parallel arrays, NaN where a price is unavailable"""
+    tickers: List[str]
+    prices: np.ndarray
+    previous_closes: np.ndarray
+    profiles: List[Dict[str, Any]]
+
+    def column(self, field: str) -> np.ndarray:
+        """A numeric profile field as an array, NaN where missing"""
+        values = [p.get(field) for p in self.profiles]
+        return np.array([v if isinstance(v, (int, float)) else np.nan for v in values], dtype="f8")
+
+
+def _download_prices(tickers: Sequence[str]) -> Dict[str, Tuple[float, float]]:
+    """Latest and previous daily close for every ticker from one multi-symbol download"""
+    frame = yf.download(
+        list(tickers), period="5d", interval="1d", auto_adjust=False,
+        group_by="column", progress=False, threads=True
+    )
+    if frame is None or frame.empty or "Close" not in frame.columns.get_level_values(0):
+        return {}
+    closes = frame["Close"].reindex(columns=list(tickers)).to_numpy(dtype="f8")
+
+    # Symbols trade on different calendars, so each takes its own last two observed closes
+    quotes = {}
+    for column, ticker in enumerate(tickers):
+        observed = closes[~np.isnan(closes[:, column]), column]
+        if len(observed):
+            quotes[ticker] = (float(observed[-1]), float(observed[-2] if len(observed) > 1 else observed[-1]))
+    return quotes
+
+
+def _info_price(ticker: str) -> Optional[Tuple[float, float]]:
+    info = get_snapshot(ticker).info
+    price = info.get("currentPrice") or info.get("regularMarketPrice")
+    if not price:
+        return None
+    return float(price), float(info.get("previousClose") or price)
+
+
+def get_prices(tickers: Sequence[str]) -> Dict[str, Tuple[float, float]]:
+    """
+    (price, previous close) per ticker. Cached quotes are reused; every other ticker is
+    fetched in a single download, and only tickers that download misses fall back to .info.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    quotes = {}
+    missing = []
+    for ticker in tickers:
+        cached = _prices.get(ticker)
+        if cached is None:
+            missing.append(ticker)
+        else:
+            quotes[ticker] = cached
+
+    if missing:
+        try:
+            downloaded = _download_prices(missing)
+        except Exception:
+            downloaded = {}
+        for ticker in missing:
+            quote = downloaded.get(ticker)
+            if quote is None:
+                try:
+                    quote = _info_price(ticker)
+                except Exception:
+                    quote = None
+            if quote is not None:
+                _prices.set(ticker, quote)
+                quotes[ticker] = quote
+    return quotes
+
+
+def _load_profile(ticker: str) -> Dict[str, Any]:
+    try:
+        info = get_snapshot(ticker).info
+    except Exception:
+        return {}
+    profile = {field: info.get(key) for field, key in PROFILE_FIELDS.items()}
+    if info:
+        profile_cache.set(ticker, profile)
+    return profile
+
+
+def _start_profiles(tickers: Sequence[str]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Future]]:
+    """Cached profiles, and futures loading the rest"""
+    profiles = {}
+    pending = {}
+    for ticker in dict.fromkeys(t.upper() for t in tickers):
+        cached = profile_cache.get(ticker)
+        if cached is None:
+            pending[ticker] = _profile_executor.submit(_load_profile, ticker)
+        else:
+            profiles[ticker] = cached
+    return profiles, pending
+
+
+def get_profiles(tickers: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+    """Profile fields per ticker from the on-disk cache, loading the misses concurrently"""
+    profiles, pending = _start_profiles(tickers)
+    profiles.update({ticker: future.result() for ticker, future in pending.items()})
+    return profiles
+
+
+def get_quote_table(tickers: Sequence[str]) -> QuoteTable:
+    """Prices and profiles for tickers in the given order; missing profiles load while prices download"""
+    tickers = [t.upper() for t in tickers]
+    profiles, pending = _start_profiles(tickers)
+    prices = get_prices(tickers)
+    profiles.update({ticker: future.result() for ticker, future in pending.items()})
+    quotes = [prices.get(t, (np.nan, np.nan)) for t in tickers]
+    return QuoteTable(
+        tickers=tickers,
+        prices=np.array([q[0] for q in quotes], dtype="f8"),
+        previous_closes=np.array([q[1] for q in quotes], dtype="f8"),
+        profiles=[profiles.get(t, {}) for t in tickers]
+    )
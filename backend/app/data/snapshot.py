@@ -0,0 +1,47 @@
+import threading
+import time
+import yfinance as yf
+from typing import Dict, Any
+from app.config.settings import get_settings
+from app.utils.cache import TTLCache
+
+settings = get_settings()
+
+
+class TickerSnapshot:
+    """A single yfinance handle per ticker whose .info payload is downloaded at most once"""
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker.upper()
+        self.stock = yf.Ticker(self.ticker)
+        self.created_at = time.time()
+        self._info: Dict[str, Any] = None
+        self._lock = threading.Lock()
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        if self._info is None:
+            with self._lock:
+                if self._info is None:
+                    self._info = self.stock.info or {}
+        return self._info
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._info is not None
+
+
+_snapshots: TTLCache[TickerSnapshot] = TTLCache(
+    max_size=settings.snapshot_cache_size,
+    ttl_seconds=settings.snapshot_ttl_seconds
+)
+
+
+def get_snapshot(ticker: str) -> TickerSnapshot:
+    """Get the shared snapshot for a ticker, creating it if missing or expired"""
+    key = ticker.upper()
+    return _snapshots.get_or_create(key, lambda: TickerSnapshot(key))
+
+
+def invalidate_snapshot(ticker: str):
+    _snapshots.pop(ticker.upper())
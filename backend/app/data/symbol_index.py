@@ -0,0 +1,293 @@
+import bisect
+import csv
+import os
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+# Bundled snapshot of US exchange listings: symbol, name, popularity tier and "|"-separated aliases
+LISTINGS_PATH = os.path.join(os.path.dirname(__file__), "listings.csv")
+
+# Everyday words that are not resolved to the company or ticker they happen to spell
+COMMON_WORDS_PATH = os.path.join(os.path.dirname(__file__), "common_words.txt")
+
+# Corporate suffixes dropped so "Nvidia Corp" and "NVIDIA Corporation" share a key, and
+# "Palantir" is the whole of "Palantir Technologies" rather than a short prefix of it
+NAME_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "companies", "ltd", "limited",
+    "plc", "llc", "lp", "holdings", "holding", "group", "sa", "se", "nv", "ag", "the", "class", "a", "b",
+    "technologies", "technology", "platforms", "communications", "entertainment", "industries",
+    "international", "systems", "enterprises", "worldwide",
+}
+
+# Lowest trigram similarity accepted for a fuzzy match, and how far it must beat any other company
+FUZZY_MIN_SCORE = 0.8
+FUZZY_MIN_MARGIN = 0.1
+
+# Least share of the completed key a prefix must cover ("cloud" is only half of "cloudflare")
+PREFIX_MIN_SCORE = 0.6
+
+# Shortest query matched by lowercase ticker, prefix or similarity, so words like "a" or "on"
+# are not taken for Agilent or Onsemi; shorter ones need capitals or an exact name
+MIN_LOOSE_MATCH_LENGTH = 3
+
+# How a suggestion matched, best first: ticker, curated alias, start of name, later word of name
+SUGGEST_KINDS = ("symbol", "alias", "name", "word")
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, spell out "&" and collapse punctuation to single spaces"""
+    text = text.lower().replace("&", " and ").replace("'", "").replace("’", "")
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def core_name(text: str) -> str:
+    """Normalized name without a leading "the" or trailing corporate suffixes"""
+    words = normalize(text).split()
+    if words and words[0] == "the":
+        words = words[1:]
+    while len(words) > 1 and words[-1] in NAME_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def without_and(key: str) -> str:
+    """A normalized key with "and" dropped, so "hims hers" and "hims and hers" meet"""
+    return " ".join(word for word in key.split() if word != "and")
+
+
+def name_keys(text: str) -> Tuple[str, ...]:
+    """Normalized and core forms of a name, each with and without "and"; empty keys dropped"""
+    keys = (normalize(text), core_name(text))
+    return tuple(dict.fromkeys(key for key in keys + tuple(map(without_and, keys)) if key))
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class Listing:
+    symbol: str
+    name: str
+    aliases: Tuple[str, ...] = ()
+    # 1 for mega caps (Dow, S&P 100), 2 for large caps and popular ADRs, 3 for small caps
+    tier: int = 3
+
+
+@dataclass(frozen=True)
+class SymbolMatch:
+    listing: Listing
+    match: str
+    score: float = 1.0
+
+
+class SymbolIndex:
+    """
+    In-memory index over exchange listings for resolving free text to a ticker.
+
+    Symbols, aliases and names (full and without corporate suffixes) are normalized
+    into keys. Lookups try, in order: a curated alias, an exact name, a prefix that
+    covers most of one company's key, and trigram similarity that clearly favours a
+    single company. A lone common word ("now", "tech") only matches through an alias;
+    otherwise it is left unresolved rather than guessed.
+    """
+
+    def __init__(self, listings: List[Listing], common_words: FrozenSet[str] = frozenset()):
+        self.listings = listings
+        self.common_words = common_words
+        self._by_symbol: Dict[str, int] = {}
+        self._aliases: Dict[str, int] = {}
+        self._names: Dict[str, int] = {}
+
+        for i, listing in enumerate(listings):
+            self._by_symbol.setdefault(listing.symbol, i)
+            for alias in listing.aliases:
+                for key in name_keys(alias):
+                    self._aliases.setdefault(key, i)
+            for key in name_keys(listing.name):
+                self._names.setdefault(key, i)
+
+        # Sorted (key, listing) pairs for prefix ranges; one key may point at several listings
+        pairs = set()
+        for i, listing in enumerate(listings):
+            keys = (listing.symbol.lower(),) + name_keys(listing.name)
+            for key in keys + tuple(normalize(alias) for alias in listing.aliases):
+                if key:
+                    pairs.add((key, i))
+        self._keys: List[str] = []
+        self._key_listings: List[int] = []
+        for key, i in sorted(pairs):
+            self._keys.append(key)
+            self._key_listings.append(i)
+
+        # Autocomplete keys also include every later word of a name ("semiconductor" -> TSM)
+        suggest_entries = set()
+        for i, listing in enumerate(listings):
+            suggest_entries.add((listing.symbol.lower(), i, 0))
+            for alias in listing.aliases:
+                suggest_entries.add((normalize(alias), i, 1))
+            words = normalize(listing.name).split()
+            suggest_entries.add((" ".join(words), i, 2))
+            for j in range(1, len(words)):
+                if words[j] not in NAME_SUFFIXES:
+                    suggest_entries.add((" ".join(words[j:]), i, 3))
+        self._suggest_keys: List[str] = []
+        self._suggest_entries: List[Tuple[int, int]] = []
+        for key, i, kind in sorted(suggest_entries):
+            if key:
+                self._suggest_keys.append(key)
+                self._suggest_entries.append((i, kind))
+
+        self._trigrams: Dict[str, List[int]] = defaultdict(list)
+        self._key_trigram_counts: List[int] = []
+        for position, key in enumerate(self._keys):
+            grams = trigrams(key)
+            self._key_trigram_counts.append(len(grams))
+            for gram in grams:
+                self._trigrams[gram].append(position)
+
+    def __len__(self) -> int:
+        return len(self.listings)
+
+    def get(self, symbol: str) -> Optional[Listing]:
+        i = self._by_symbol.get(symbol.strip().upper().replace(".", "-"))
+        return self.listings[i] if i is not None else None
+
+    @staticmethod
+    def _prefix_range_in(keys: List[str], prefix: str) -> Tuple[int, int]:
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + "\uffff", lo=start)
+        return start, end
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        return self._prefix_range_in(self._keys, prefix)
+
+    def _match_prefix(self, key: str) -> Optional[SymbolMatch]:
+        if len(key) < MIN_LOOSE_MATCH_LENGTH:
+            return None
+        start, end = self._prefix_range(key)
+        owners = set(self._key_listings[start:end])
+        if len(owners) != 1:
+            return None
+        score = len(key) / min(len(self._keys[position]) for position in range(start, end))
+        if score < PREFIX_MIN_SCORE:
+            return None
+        return SymbolMatch(self.listings[owners.pop()], "prefix", round(score, 3))
+
+    def _match_fuzzy(self, key: str) -> Optional[SymbolMatch]:
+        grams = trigrams(key)
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for position in self._trigrams.get(gram, ()):
+                shared[position] += 1
+
+        # Best Dice coefficient per company
+        best: Dict[int, float] = {}
+        for position, count in shared.items():
+            score = 2 * count / (len(grams) + self._key_trigram_counts[position])
+            owner = self._key_listings[position]
+            if score > best.get(owner, 0):
+                best[owner] = score
+
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+        if not ranked or ranked[0][1] < FUZZY_MIN_SCORE:
+            return None
+        if len(ranked) > 1 and ranked[0][1] - ranked[1][1] < FUZZY_MIN_MARGIN:
+            return None
+        return SymbolMatch(self.listings[ranked[0][0]], "fuzzy", round(ranked[0][1], 3))
+
+    def resolve(self, query: str) -> Optional[SymbolMatch]:
+        """Best single listing for free text, or None if the query is ambiguous or descriptive"""
+        query = query.strip()
+        if not query:
+            return None
+
+        # Typed in capitals it is almost certainly a ticker ("ON", "META")
+        symbol = query.upper().replace(".", "-").replace(" ", "")
+        if query.isupper() and symbol in self._by_symbol:
+            return SymbolMatch(self.listings[self._by_symbol[symbol]], "symbol")
+
+        keys = name_keys(query)
+        for key in keys:
+            if key in self._aliases:
+                return SymbolMatch(self.listings[self._aliases[key]], "alias")
+
+        # "now" or "tech" alone is more likely a word than NOW Inc or Bio-Techne
+        if normalize(query) in self.common_words:
+            return None
+
+        for key in keys:
+            if key in self._names:
+                return SymbolMatch(self.listings[self._names[key]], "name")
+
+        if len(symbol) >= MIN_LOOSE_MATCH_LENGTH and symbol in self._by_symbol:
+            return SymbolMatch(self.listings[self._by_symbol[symbol]], "symbol")
+
+        key = core_name(query)
+        if len(key) < MIN_LOOSE_MATCH_LENGTH:
+            return None
+        return self._match_prefix(key) or self._match_prefix(without_and(key)) or self._match_fuzzy(key)
+
+    def suggest(self, query: str, limit: int = 8) -> List[SymbolMatch]:
+        """
+        Listings whose ticker, alias or any word of the name starts with the query.
+        Ranked by exact matches first, then popularity tier, match kind and closeness
+        of the completion; the score is the fraction of the matched key that was typed.
+        """
+        key = normalize(query)
+        if not key or limit <= 0:
+            return []
+        start, end = self._prefix_range_in(self._suggest_keys, key)
+
+        best: Dict[int, Tuple[Tuple[int, int, int, int], str]] = {}
+        for position in range(start, end):
+            matched = self._suggest_keys[position]
+            i, kind = self._suggest_entries[position]
+            rank = (0 if matched == key else 1, self.listings[i].tier, kind, len(matched))
+            if i not in best or rank < best[i][0]:
+                best[i] = (rank, matched)
+
+        ranked = sorted(best.items(), key=lambda item: (item[1][0], self.listings[item[0]].symbol))[:limit]
+        return [
+            SymbolMatch(self.listings[i], SUGGEST_KINDS[rank[2]], round(len(key) / len(matched), 3))
+            for i, (rank, matched) in ranked
+        ]
+
+
+def load_common_words(path: str = COMMON_WORDS_PATH) -> FrozenSet[str]:
+    with open(path, encoding="utf-8") as f:
+        return frozenset(normalize(line) for line in f if line.strip() and not line.startswith("#"))
+
+
+def load_listings(path: str = LISTINGS_PATH) -> List[Listing]:
+    listings = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            aliases = tuple(a for a in (row.get("aliases") or "").split("|") if a)
+            listings.append(Listing(
+                symbol=row["symbol"].strip().upper(),
+                name=row["name"].strip(),
+                aliases=aliases,
+                tier=int(row.get("tier") or 3)
+            ))
+    return listings
+
+
+_index: Optional[SymbolIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_symbol_index() -> SymbolIndex:
+    """Shared index over the bundled listings, built on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SymbolIndex(load_listings(), load_common_words())
+    return _index
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func
 from typing import List, Optional
 from datetime import datetime
 from app.db.models import Query, Report, ReportData
@@ -13,13 +13,10 @@ def create_query(
     company: str
 ) -> Query:
     """Create a new query record"""
-    now = datetime.now()
     query = Query(
-        date=now.strftime("%Y-%m-%d"),
-        time=now.strftime("%H:%M:%S"),
         request=request,
         company=company,
-        timestamp=now
+        created_at=datetime.now()
     )
     db.add(query)
     db.commit()
@@ -27,59 +24,73 @@ def create_query(
     return query
 
 
-def get_query(db: Session, query_id: int) -> Optional[Query]:
+def get_query(db: Session, query_id: str) -> Optional[Query]:
     """Get a query by ID"""
-    return db.query(Query).filter(Query.id == query_id).first()
+    return db.get(Query, query_id)
 
 
-def get_all_queries(db: Session, skip: int = 0, limit: int = 100) -> List[Query]:
-    """Get all queries"""
-    return db.query(Query).order_by(desc(Query.timestamp)).offset(skip).limit(limit).all()
+def get_all_queries(db: Session, skip: int = 0, limit: Optional[int] = None) -> List[Query]:
+    """Get all queries, oldest first"""
+    return db.query(Query).order_by(Query.created_at).offset(skip).limit(limit).all()
 
 
 def get_queries_by_company(db: Session, company: str) -> List[Query]:
     """Get all queries for a specific company"""
-    return db.query(Query).filter(Query.company == company).order_by(desc(Query.timestamp)).all()
+    return db.query(Query).filter(Query.company == company).order_by(desc(Query.created_at)).all()
 
 
 # ============= Report CRUD =============
 
 def create_report(
     db: Session,
-    query_id: int,
+    query_id: str,
     company: str,
-    report_path: str
+    report_path: str,
+    report_id: Optional[str] = None
 ) -> Report:
     """Create a new report record"""
-    # Get the latest version number for this company
-    latest_report = db.query(Report).filter(Report.company == company).order_by(desc(Report.version)).first()
-    version = (latest_report.version + 1) if latest_report else 1
+    # Version numbers count reports for the same company label, case-insensitively
+    existing = db.query(func.count(Report.id)).filter(func.lower(Report.company) == company.lower()).scalar()
     
     report = Report(
         query_id=query_id,
         company=company,
         report_path=report_path,
-        version=version
+        version=existing + 1,
+        created_at=datetime.now()
     )
+    if report_id:
+        report.id = report_id
     db.add(report)
     db.commit()
     db.refresh(report)
     return report
 
 
-def get_report(db: Session, report_id: int) -> Optional[Report]:
+def get_report(db: Session, report_id: str) -> Optional[Report]:
     """Get a report by ID"""
-    return db.query(Report).filter(Report.id == report_id).first()
+    return db.get(Report, report_id)
 
 
-def get_all_reports(db: Session, skip: int = 0, limit: int = 100) -> List[Report]:
-    """Get all reports"""
-    return db.query(Report).order_by(desc(Report.created_at)).offset(skip).limit(limit).all()
+def update_report_path(db: Session, report_id: str, report_path: str) -> Optional[Report]:
+    """Point a report at its rendered PDF"""
+    report = get_report(db, report_id)
+    if report:
+        report.report_path = report_path
+        db.commit()
+        db.refresh(report)
+    return report
+
+
+def get_all_reports(db: Session, skip: int = 0, limit: Optional[int] = None) -> List[Report]:
+    """Get all reports, oldest first"""
+    return db.query(Report).order_by(Report.created_at).offset(skip).limit(limit).all()
 
 
 def get_reports_by_company(db: Session, company: str) -> List[Report]:
-    """Get all reports for a specific company"""
-    return db.query(Report).filter(Report.company == company).order_by(desc(Report.created_at)).all()
+    """Get all reports whose company label contains the given text"""
+    pattern = f"%{company.lower()}%"
+    return db.query(Report).filter(func.lower(Report.company).like(pattern)).order_by(Report.created_at).all()
 
 
 def get_companies_with_reports(db: Session) -> List[str]:
@@ -92,7 +103,7 @@ def get_companies_with_reports(db: Session) -> List[str]:
 
 def create_report_data(
     db: Session,
-    report_id: int,
+    report_id: str,
     company_info: Optional[str] = None,
     financial_data: Optional[str] = None,
     risk_data: Optional[str] = None,
@@ -104,7 +115,8 @@ def create_report_data(
         company_info=company_info,
         financial_data=financial_data,
         risk_data=risk_data,
-        news_data=news_data
+        news_data=news_data,
+        created_at=datetime.now()
     )
     db.add(report_data)
     db.commit()
@@ -112,14 +124,19 @@ def create_report_data(
     return report_data
 
 
-def get_report_data(db: Session, report_id: int) -> Optional[ReportData]:
+def get_report_data(db: Session, report_id: str) -> Optional[ReportData]:
     """Get report data by report ID"""
     return db.query(ReportData).filter(ReportData.report_id == report_id).first()
 
 
+def get_all_report_data(db: Session) -> List[ReportData]:
+    """Get every report data record, oldest first"""
+    return db.query(ReportData).order_by(ReportData.created_at).all()
+
+
 def update_report_data(
     db: Session,
-    report_id: int,
+    report_id: str,
     company_info: Optional[str] = None,
     financial_data: Optional[str] = None,
     risk_data: Optional[str] = None,
@@ -139,4 +156,3 @@ def update_report_data(
         db.commit()
         db.refresh(report_data)
     return report_data
-
@@ -1,21 +1,40 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import declarative_base, sessionmaker, Session
 from typing import Generator
 from app.config.settings import get_settings
+from app.config.paths import DATA_DIR
 
 settings = get_settings()
 
+if not settings.database_url:
+    os.makedirs(DATA_DIR, exist_ok=True)
+DATABASE_URL = settings.database_url or f"sqlite:///{os.path.join(DATA_DIR, 'market_scout.db')}"
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
 # Create database engine
 engine = create_engine(
-    settings.database_url,
+    DATABASE_URL,
     pool_pre_ping=True,
     pool_recycle=3600,
-    echo=False
+    echo=False,
+    connect_args={"check_same_thread": False} if IS_SQLITE else {}
 )
 
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        """WAL lets readers proceed while a report is being written"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)
 
 # Base class for models
 Base = declarative_base()
@@ -32,5 +51,5 @@ def get_db() -> Generator[Session, None, None]:
 
 def init_db():
     """Initialize database tables"""
+    import app.db.models  # noqa: F401 - registers the models on Base
     Base.metadata.create_all(bind=engine)
-
@@ -3,25 +3,42 @@ import json
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 import uuid
+from app.config.paths import DATA_DIR
+from app.db.log_store import LogStore
 
-# Detect if running in serverless environment (Vercel)
-IS_SERVERLESS = os.environ.get("VERCEL") or os.environ.get("AWS_LAMBDA_FUNCTION_NAME")
-
-# Get the absolute path to the data directory
-if IS_SERVERLESS:
-    # Use /tmp for serverless environments (only writable directory)
-    DATA_DIR = "/tmp/data"
-else:
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    DATA_DIR = os.path.join(BASE_DIR, "data")
-
+# Legacy whole-file JSON stores, imported into the append-only logs on first start
 QUERIES_FILE = os.path.join(DATA_DIR, "queries.json")
 REPORTS_FILE = os.path.join(DATA_DIR, "reports.json")
 REPORT_DATA_FILE = os.path.join(DATA_DIR, "report_data.json")
 
+QUERIES_LOG = os.path.join(DATA_DIR, "queries.jsonl")
+REPORTS_LOG = os.path.join(DATA_DIR, "reports.jsonl")
+REPORT_DATA_LOG = os.path.join(DATA_DIR, "report_data.jsonl")
+
 os.makedirs(DATA_DIR, exist_ok=True)
 
 
+def normalize_company(company: str) -> str:
+    return " ".join(company.lower().split())
+
+
+def extract_ticker(company: str) -> str:
+    """Ticker from a "Company Name (TICKER)" label, lowercased"""
+    if "(" in company and company.rstrip().endswith(")"):
+        return company.rstrip()[:-1].rsplit("(", 1)[-1].strip().lower()
+    return ""
+
+
+queries_store = LogStore(QUERIES_LOG, legacy_path=QUERIES_FILE)
+reports_store = LogStore(REPORTS_LOG, legacy_path=REPORTS_FILE, indexes={
+    "company": lambda r: [normalize_company(r.get("company", ""))],
+    "ticker": lambda r: [extract_ticker(r.get("company", ""))],
+})
+report_data_store = LogStore(REPORT_DATA_LOG, legacy_path=REPORT_DATA_FILE, indexes={
+    "report_id": lambda rd: [rd.get("report_id", "")],
+})
+
+
 def load_json(filepath: str) -> List[Dict[str, Any]]:
     if not os.path.exists(filepath):
         return []
@@ -38,63 +55,60 @@ def save_json(filepath: str, data: List[Dict[str, Any]]):
 
 
 def create_query(request: str, company: str) -> Dict[str, Any]:
-    queries = load_json(QUERIES_FILE)
     query = {
         "id": str(uuid.uuid4()),
         "request": request,
         "company": company,
         "created_at": datetime.now().isoformat()
     }
-    queries.append(query)
-    save_json(QUERIES_FILE, queries)
-    return query
+    return queries_store.append(query)
 
 
 def get_queries() -> List[Dict[str, Any]]:
-    return load_json(QUERIES_FILE)
+    return queries_store.all()
 
 
-def create_report(query_id: str, company: str, report_path: str) -> Dict[str, Any]:
-    reports = load_json(REPORTS_FILE)
-    
+def create_report(query_id: str, company: str, report_path: str, report_id: Optional[str] = None) -> Dict[str, Any]:
     # Get version number
-    company_reports = [r for r in reports if r.get("company", "").lower() == company.lower()]
-    version = len(company_reports) + 1
+    version = reports_store.count("company", normalize_company(company)) + 1
     
     report = {
-        "id": str(uuid.uuid4()),
+        "id": report_id or str(uuid.uuid4()),
         "query_id": query_id,
         "company": company,
         "report_path": report_path,
         "version": version,
         "created_at": datetime.now().isoformat()
     }
-    reports.append(report)
-    save_json(REPORTS_FILE, reports)
-    return report
+    return reports_store.append(report)
+
+
+def update_report_path(report_id: str, report_path: str) -> Optional[Dict[str, Any]]:
+    return reports_store.update(report_id, {"report_path": report_path})
 
 
 def get_report(report_id: str) -> Optional[Dict[str, Any]]:
-    reports = load_json(REPORTS_FILE)
-    for r in reports:
-        if r["id"] == report_id:
-            return r
-    return None
+    return reports_store.get(report_id)
 
 
 def get_reports_by_company(company: str) -> List[Dict[str, Any]]:
-    reports = load_json(REPORTS_FILE)
-    return [r for r in reports if company.lower() in r.get("company", "").lower()]
+    """Reports whose company label contains the query, or whose ticker equals it"""
+    query = normalize_company(company)
+    companies = [key for key in reports_store.index_keys("company") if query in key]
+    ids = reports_store.find_ids("company", companies)
+    ticker_ids = reports_store.find_ids("ticker", [query])
+    if ticker_ids:
+        ids = list(dict.fromkeys(ids + ticker_ids))
+    return reports_store.get_many(ids)
 
 
 def get_all_reports() -> List[Dict[str, Any]]:
-    return load_json(REPORTS_FILE)
+    return reports_store.all()
 
 
 def get_grouped_reports() -> Dict[str, List[Dict[str, Any]]]:
-    reports = load_json(REPORTS_FILE)
     grouped = {}
-    for r in reports:
+    for r in reports_store.all():
         company = r.get("company", "Unknown")
         if company not in grouped:
             grouped[company] = []
@@ -103,7 +117,6 @@ def get_grouped_reports() -> Dict[str, List[Dict[str, Any]]]:
 
 
 def create_report_data(report_id: str, company_info: str, financial_data: str, risk_data: str, news_data: str) -> Dict[str, Any]:
-    report_data_list = load_json(REPORT_DATA_FILE)
     entry = {
         "id": str(uuid.uuid4()),
         "report_id": report_id,
@@ -113,14 +126,13 @@ def create_report_data(report_id: str, company_info: str, financial_data: str, r
         "news_data": news_data,
         "created_at": datetime.now().isoformat()
     }
-    report_data_list.append(entry)
-    save_json(REPORT_DATA_FILE, report_data_list)
-    return entry
+    return report_data_store.append(entry)
 
 
 def get_report_data(report_id: str) -> Optional[Dict[str, Any]]:
-    report_data_list = load_json(REPORT_DATA_FILE)
-    for rd in report_data_list:
-        if rd["report_id"] == report_id:
-            return rd
-    return None
+    matches = report_data_store.find("report_id", report_id)
+    return matches[0] if matches else None
+
+
+def get_all_report_data() -> List[Dict[str, Any]]:
+    return report_data_store.all()
@@ -0,0 +1,272 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterator, Tuple, Callable, Iterable, Set
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within this process
+    fcntl = None
+
+KeyFunction = Callable[[Dict[str, Any]], Iterable[str]]
+
+
+class LogStore:
+    """
+    Append-only JSONL store of records keyed by "id".
+
+    Every write appends one line; an update appends a new version of the record and
+    leaves the old line as garbage. An in-memory index maps each id to the byte range
+    of its latest version, so appends are O(1) and lookups read a single line.
+    Optional secondary indexes map derived keys (e.g. a normalized company name)
+    to record ids and are kept in sync with every write.
+    The log is rewritten without garbage once dead bytes pass a threshold, and all
+    indexes are rebuilt if the file is changed on disk by anything else. Writers hold
+    an exclusive lock on a sibling ".lock" file so several processes can share a log.
+    """
+
+    def __init__(self, path: str, legacy_path: Optional[str] = None,
+                 indexes: Optional[Dict[str, KeyFunction]] = None,
+                 compact_ratio: float = 0.5, compact_min_bytes: int = 1_000_000):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._order: Dict[str, int] = {}
+        self._key_functions: Dict[str, KeyFunction] = indexes or {}
+        self._secondary: Dict[str, Dict[str, Set[str]]] = {}
+        self._record_keys: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+        self._size = 0
+        self._dead_bytes = 0
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.RLock()
+        self._lock_path = f"{path}.lock"
+        self._write_depth = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not os.path.exists(path) and legacy_path and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+        self._rebuild()
+        self._maybe_compact()
+
+    def _import_legacy(self, legacy_path: str):
+        try:
+            with open(legacy_path, "r") as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            records = []
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            for record in records:
+                if isinstance(record, dict) and "id" in record:
+                    f.write(self._encode(record))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    @contextmanager
+    def _write_lock(self):
+        """Hold the in-process lock and, outermost only, an exclusive lock shared with other processes"""
+        with self._lock:
+            lock_file = None
+            if not self._write_depth and fcntl is not None:
+                lock_file = open(self._lock_path, "ab")
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._write_depth += 1
+            try:
+                yield
+            finally:
+                self._write_depth -= 1
+                if lock_file is not None:
+                    lock_file.close()
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> bytes:
+        return (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+
+    def _stat_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _ensure_fresh(self):
+        """Rebuild every index if the log was rewritten or appended to outside this store"""
+        if self._stat_signature() != self._signature:
+            self._rebuild()
+
+    def _index_record(self, record: Dict[str, Any]):
+        record_id = record["id"]
+        if record_id not in self._order:
+            self._order[record_id] = len(self._order)
+        for name, key_function in self._key_functions.items():
+            index = self._secondary.setdefault(name, {})
+            keys = self._record_keys.setdefault(name, {})
+            for key in keys.get(record_id, ()):
+                ids = index.get(key)
+                if ids is not None:
+                    ids.discard(record_id)
+                    if not ids:
+                        del index[key]
+            new_keys = tuple(k for k in key_function(record) if k)
+            keys[record_id] = new_keys
+            for key in new_keys:
+                index.setdefault(key, set()).add(record_id)
+
+    def _rebuild(self):
+        """
+        Scan the log once to rebuild all indexes. A final line without its newline may be
+        another process's write in progress, so it is skipped here and only cut off by a
+        writer holding the lock.
+        """
+        self._index = {}
+        self._order = {}
+        self._secondary = {}
+        self._record_keys = {}
+        dead = 0
+        offset = 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for line in f:
+                    length = len(line)
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                        record_id = record["id"]
+                    except (ValueError, KeyError, TypeError):
+                        dead += length
+                        offset += length
+                        continue
+                    if record_id in self._index:
+                        dead += self._index[record_id][1]
+                    self._index[record_id] = (offset, length)
+                    self._index_record(record)
+                    offset += length
+        self._size = offset
+        self._dead_bytes = dead
+        self._signature = self._stat_signature()
+
+    def _drop_torn_tail(self):
+        """Cut off an unfinished final line; only safe while holding the write lock"""
+        if os.path.exists(self.path) and os.path.getsize(self.path) > self._size:
+            with open(self.path, "r+b") as f:
+                f.truncate(self._size)
+
+    def _read_at(self, f, location: Tuple[int, int]) -> Dict[str, Any]:
+        f.seek(location[0])
+        return json.loads(f.read(location[1]))
+
+    def append(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Append a new record or a new version of an existing one"""
+        data = self._encode(record)
+        with self._write_lock():
+            self._ensure_fresh()
+            self._drop_torn_tail()
+            with open(self.path, "ab") as f:
+                f.write(data)
+                end = f.tell()
+            previous = self._index.get(record["id"])
+            if previous:
+                self._dead_bytes += previous[1]
+            self._index[record["id"]] = (end - len(data), len(data))
+            self._index_record(record)
+            self._size = end
+            self._signature = self._stat_signature()
+            self._maybe_compact()
+        return record
+
+    def update(self, record_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._write_lock():
+            record = self.get(record_id)
+            if record is None:
+                return None
+            record.update(changes)
+            return self.append(record)
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._ensure_fresh()
+            location = self._index.get(record_id)
+            if location is None:
+                return None
+            with open(self.path, "rb") as f:
+                return self._read_at(f, location)
+
+    def get_many(self, record_ids: List[str]) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._ensure_fresh()
+            locations = [self._index[i] for i in record_ids if i in self._index]
+            with open(self.path, "rb") as f:
+                return [self._read_at(f, location) for location in locations]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.all())
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_fresh()
+            return len(self._index)
+
+    def __contains__(self, record_id: str) -> bool:
+        with self._lock:
+            self._ensure_fresh()
+            return record_id in self._index
+
+    def all(self) -> List[Dict[str, Any]]:
+        """Latest version of every record, in order of first insertion"""
+        with self._lock:
+            self._ensure_fresh()
+            return self.get_many(list(self._index))
+
+    def find_ids(self, index_name: str, keys: Iterable[str]) -> List[str]:
+        """Ids of records matching any of the keys in a secondary index, in insertion order"""
+        with self._lock:
+            self._ensure_fresh()
+            index = self._secondary.get(index_name, {})
+            ids: Set[str] = set()
+            for key in keys:
+                ids |= index.get(key, set())
+            return sorted(ids, key=self._order.__getitem__)
+
+    def find(self, index_name: str, key: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self.get_many(self.find_ids(index_name, [key]))
+
+    def count(self, index_name: str, key: str) -> int:
+        with self._lock:
+            self._ensure_fresh()
+            return len(self._secondary.get(index_name, {}).get(key, ()))
+
+    def index_keys(self, index_name: str) -> List[str]:
+        """Distinct keys currently present in a secondary index"""
+        with self._lock:
+            self._ensure_fresh()
+            return list(self._secondary.get(index_name, {}))
+
+    def _maybe_compact(self):
+        if self._dead_bytes >= self.compact_min_bytes and self._dead_bytes >= self._size * self.compact_ratio:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the log with only the latest version of each record"""
+        with self._write_lock():
+            self._ensure_fresh()
+            tmp_path = f"{self.path}.tmp"
+            index: Dict[str, Tuple[int, int]] = {}
+            offset = 0
+            with open(self.path, "rb") as src, open(tmp_path, "wb") as dst:
+                for record_id, (start, length) in self._index.items():
+                    src.seek(start)
+                    dst.write(src.read(length))
+                    index[record_id] = (offset, length)
+                    offset += length
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(tmp_path, self.path)
+            self._index = index
+            self._size = offset
+            self._dead_bytes = 0
+            self._signature = self._stat_signature()
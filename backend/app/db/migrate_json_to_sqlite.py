@@ -0,0 +1,30 @@
+"""
+Copy report history from the JSON file store into the SQL database.
+
+Usage (from the backend directory):
+    python -m app.db.migrate_json_to_sqlite
+
+Reads the append-only logs (importing any legacy queries.json, reports.json and
+report_data.json on the way) and inserts every record into the database at
+DATABASE_URL, keeping ids and timestamps. Safe to run more than once.
+"""
+from app.db import file_storage
+from app.db import sql_storage
+from app.db.database import DATABASE_URL
+
+
+def main():
+    imported = sql_storage.import_records(
+        queries=file_storage.get_queries(),
+        reports=file_storage.get_all_reports(),
+        report_data=file_storage.get_all_report_data()
+    )
+    print(
+        f"Imported {imported['queries']} queries, {imported['reports']} reports and "
+        f"{imported['report_data']} report data records into {DATABASE_URL}"
+    )
+    print("Set STORAGE_BACKEND=sqlite to serve from the database.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,22 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+import uuid
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.database import Base
 
 
+def new_id() -> str:
+    return str(uuid.uuid4())
+
+
 class Query(Base):
     """Store user queries for stock research"""
     __tablename__ = "queries"
     
-    id = Column(Integer, primary_key=True, index=True)
-    date = Column(String(50), nullable=False)  # Format: YYYY-MM-DD
-    time = Column(String(50), nullable=False)  # Format: HH:MM:SS
+    id = Column(String(36), primary_key=True, default=new_id)
     request = Column(Text, nullable=False)  # User's original request
     company = Column(String(255), nullable=False, index=True)  # Company name/ticker
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=datetime.now, nullable=False, index=True)
     
     # Relationships
     reports = relationship("Report", back_populates="query", cascade="all, delete-orphan")
@@ -22,12 +25,15 @@ class Query(Base):
 class Report(Base):
     """Store generated reports"""
     __tablename__ = "reports"
+    __table_args__ = (
+        Index("ix_reports_company_created_at", "company", "created_at"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
-    query_id = Column(Integer, ForeignKey("queries.id"), nullable=False)
+    id = Column(String(36), primary_key=True, default=new_id)
+    query_id = Column(String(36), ForeignKey("queries.id"), nullable=False)
     company = Column(String(255), nullable=False, index=True)
     report_path = Column(String(500), nullable=False)  # Path to PDF file
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=datetime.now, nullable=False, index=True)
     version = Column(Integer, default=1, nullable=False)  # Version number for same company
     
     # Relationships
@@ -39,13 +45,13 @@ class ReportData(Base):
     """Store raw agent outputs for each report"""
     __tablename__ = "report_data"
     
-    id = Column(Integer, primary_key=True, index=True)
-    report_id = Column(Integer, ForeignKey("reports.id"), nullable=False, unique=True)
+    id = Column(String(36), primary_key=True, default=new_id)
+    report_id = Column(String(36), ForeignKey("reports.id"), nullable=False, unique=True)
     company_info = Column(Text, nullable=True)  # JSON string from company agent
     financial_data = Column(Text, nullable=True)  # JSON string from financial agent
     risk_data = Column(Text, nullable=True)  # JSON string from risk agent
     news_data = Column(Text, nullable=True)  # JSON string from news agent
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
     
     # Relationships
     report = relationship("Report", back_populates="report_data")
-
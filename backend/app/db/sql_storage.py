@@ -0,0 +1,204 @@
+"""
+SQLite (or any SQLAlchemy URL) implementation of the file_storage API.
+Records are returned as plain dicts shaped exactly like the file-backed ones.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterator
+from sqlalchemy.orm import Session
+from app.db import crud
+from app.db.database import SessionLocal, init_db
+from app.db.models import Query, Report, ReportData
+
+init_db()
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    db = SessionLocal()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _query_dict(query: Query) -> Dict[str, Any]:
+    return {
+        "id": query.id,
+        "request": query.request,
+        "company": query.company,
+        "created_at": _timestamp(query.created_at)
+    }
+
+
+def _report_dict(report: Report) -> Dict[str, Any]:
+    return {
+        "id": report.id,
+        "query_id": report.query_id,
+        "company": report.company,
+        "report_path": report.report_path,
+        "version": report.version,
+        "created_at": _timestamp(report.created_at)
+    }
+
+
+def _report_data_dict(report_data: ReportData) -> Dict[str, Any]:
+    return {
+        "id": report_data.id,
+        "report_id": report_data.report_id,
+        "company_info": report_data.company_info,
+        "financial_data": report_data.financial_data,
+        "risk_data": report_data.risk_data,
+        "news_data": report_data.news_data,
+        "created_at": _timestamp(report_data.created_at)
+    }
+
+
+def create_query(request: str, company: str) -> Dict[str, Any]:
+    with session_scope() as db:
+        return _query_dict(crud.create_query(db, request=request, company=company))
+
+
+def get_queries() -> List[Dict[str, Any]]:
+    with session_scope() as db:
+        return [_query_dict(q) for q in crud.get_all_queries(db)]
+
+
+def create_report(query_id: str, company: str, report_path: str, report_id: Optional[str] = None) -> Dict[str, Any]:
+    with session_scope() as db:
+        return _report_dict(crud.create_report(db, query_id, company, report_path, report_id=report_id))
+
+
+def update_report_path(report_id: str, report_path: str) -> Optional[Dict[str, Any]]:
+    with session_scope() as db:
+        report = crud.update_report_path(db, report_id, report_path)
+        return _report_dict(report) if report else None
+
+
+def get_report(report_id: str) -> Optional[Dict[str, Any]]:
+    with session_scope() as db:
+        report = crud.get_report(db, report_id)
+        return _report_dict(report) if report else None
+
+
+def get_reports_by_company(company: str) -> List[Dict[str, Any]]:
+    with session_scope() as db:
+        return [_report_dict(r) for r in crud.get_reports_by_company(db, company)]
+
+
+def get_all_reports() -> List[Dict[str, Any]]:
+    with session_scope() as db:
+        return [_report_dict(r) for r in crud.get_all_reports(db)]
+
+
+def get_grouped_reports() -> Dict[str, List[Dict[str, Any]]]:
+    grouped = {}
+    for r in get_all_reports():
+        grouped.setdefault(r.get("company", "Unknown"), []).append(r)
+    return grouped
+
+
+def create_report_data(report_id: str, company_info: str, financial_data: str, risk_data: str, news_data: str) -> Dict[str, Any]:
+    with session_scope() as db:
+        return _report_data_dict(crud.create_report_data(
+            db, report_id,
+            company_info=company_info,
+            financial_data=financial_data,
+            risk_data=risk_data,
+            news_data=news_data
+        ))
+
+
+def get_report_data(report_id: str) -> Optional[Dict[str, Any]]:
+    with session_scope() as db:
+        report_data = crud.get_report_data(db, report_id)
+        return _report_data_dict(report_data) if report_data else None
+
+
+def get_all_report_data() -> List[Dict[str, Any]]:
+    with session_scope() as db:
+        return [_report_data_dict(rd) for rd in crud.get_all_report_data(db)]
+
+
+def _parse_timestamp(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return datetime.now()
+
+
+def import_records(queries: List[Dict[str, Any]], reports: List[Dict[str, Any]],
+                   report_data: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Insert records exported from another backend, keeping their ids, versions and timestamps.
+    Records whose id already exists are skipped, so repeated imports are safe.
+    Reports pointing at a missing query get a placeholder query so the foreign key holds.
+    """
+    imported = {"queries": 0, "reports": 0, "report_data": 0}
+    with session_scope() as db:
+        query_ids = {row[0] for row in db.query(Query.id).all()}
+        report_ids = {row[0] for row in db.query(Report.id).all()}
+        data_report_ids = {row[0] for row in db.query(ReportData.report_id).all()}
+        data_ids = {row[0] for row in db.query(ReportData.id).all()}
+        
+        for q in queries:
+            if q.get("id") in query_ids:
+                continue
+            db.add(Query(
+                id=q["id"],
+                request=q.get("request", ""),
+                company=q.get("company", ""),
+                created_at=_parse_timestamp(q.get("created_at"))
+            ))
+            query_ids.add(q["id"])
+            imported["queries"] += 1
+        
+        for r in reports:
+            if r.get("id") in report_ids:
+                continue
+            if r.get("query_id") not in query_ids:
+                db.add(Query(
+                    id=r.get("query_id") or r["id"],
+                    request="",
+                    company=r.get("company", ""),
+                    created_at=_parse_timestamp(r.get("created_at"))
+                ))
+                query_ids.add(r.get("query_id") or r["id"])
+            db.add(Report(
+                id=r["id"],
+                query_id=r.get("query_id") or r["id"],
+                company=r.get("company", ""),
+                report_path=r.get("report_path", "pending"),
+                version=r.get("version", 1),
+                created_at=_parse_timestamp(r.get("created_at"))
+            ))
+            report_ids.add(r["id"])
+            imported["reports"] += 1
+        
+        for rd in report_data:
+            if rd.get("id") in data_ids or rd.get("report_id") in data_report_ids or rd.get("report_id") not in report_ids:
+                continue
+            db.add(ReportData(
+                id=rd["id"],
+                report_id=rd["report_id"],
+                company_info=rd.get("company_info"),
+                financial_data=rd.get("financial_data"),
+                risk_data=rd.get("risk_data"),
+                news_data=rd.get("news_data"),
+                created_at=_parse_timestamp(rd.get("created_at"))
+            ))
+            data_ids.add(rd["id"])
+            data_report_ids.add(rd["report_id"])
+            imported["report_data"] += 1
+        
+        db.commit()
+    return imported
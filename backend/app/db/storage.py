@@ -0,0 +1,14 @@
+from types import ModuleType
+from app.config.settings import get_settings
+
+
+def get_storage() -> ModuleType:
+    """Storage backend selected by settings.storage_backend ("file" or "sqlite")"""
+    backend = get_settings().storage_backend.lower()
+    if backend == "sqlite":
+        from app.db import sql_storage
+        return sql_storage
+    if backend == "file":
+        from app.db import file_storage
+        return file_storage
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,196 @@
+import json
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+from app.config.settings import get_settings
+from app.agents.orchestrator import orchestrate_research
+from app.reports.generator import render_report
+from app.db.storage import get_storage
+from app.utils.cache import TTLCache
+
+settings = get_settings()
+storage = get_storage()
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Steps after which a job emits nothing more
+TERMINAL_STEPS = ("complete", "error")
+
+# Steps that open a timed stage; each stage runs until the next one opens or the job ends
+STAGE_STEPS = {"started": "resolve", "resolved": "gather", "analyzing": "analysis", "rendering": "pdf"}
+
+EventSubscriber = Callable[[Dict[str, Any]], None]
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the research queue is at capacity"""
+
+
+@dataclass
+class ResearchJob:
+    query: str
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = QUEUED
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    company: Optional[str] = None
+    report_path: Optional[str] = None
+    error: Optional[str] = None
+    stages: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    events: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+    _stage_started: Dict[str, float] = field(default_factory=dict, repr=False)
+    _subscribers: List[EventSubscriber] = field(default_factory=list, repr=False)
+    _events_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def emit(self, step: str, payload: Optional[Dict[str, Any]] = None):
+        """Record a progress event and hand it to every subscriber"""
+        if step in STAGE_STEPS or step in TERMINAL_STEPS:
+            self.finish_stages()
+        if step in STAGE_STEPS:
+            self.start_stage(STAGE_STEPS[step])
+        event = {"step": step, "report_id": self.id, **(payload or {})}
+        with self._events_lock:
+            self.events.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber(event)
+
+    def subscribe(self, subscriber: EventSubscriber) -> List[Dict[str, Any]]:
+        """Register for future events. Returns the events emitted so far so none are missed."""
+        with self._events_lock:
+            self._subscribers.append(subscriber)
+            return list(self.events)
+
+    def unsubscribe(self, subscriber: EventSubscriber):
+        with self._events_lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def start_stage(self, stage: str):
+        self._stage_started[stage] = time.monotonic()
+        self.stages[stage] = {"started_at": datetime.now().isoformat(), "duration_ms": None}
+
+    def finish_stage(self, stage: str):
+        started = self._stage_started.pop(stage, None)
+        if started is not None:
+            self.stages[stage]["duration_ms"] = round((time.monotonic() - started) * 1000)
+
+    def finish_stages(self):
+        for stage in list(self._stage_started):
+            self.finish_stage(stage)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "report_id": self.id,
+            "query": self.query,
+            "status": self.status,
+            "company": self.company,
+            "created_at": self.created_at,
+            "report_path": self.report_path,
+            "error": self.error,
+            "stages": self.stages,
+        }
+
+
+def save_research_report(report_data: Dict[str, Any], request_text: str, company: str,
+                         report_id: Optional[str] = None) -> Dict[str, Any]:
+    """Persist the query, render the PDF and store raw agent outputs. Returns the report record."""
+    query_record = storage.create_query(request=request_text, company=company)
+    report_record = storage.create_report(
+        query_id=query_record["id"], company=company, report_path="pending", report_id=report_id
+    )
+
+    pdf_path = render_report(report_data, report_record["id"])
+    report_record = storage.update_report_path(report_record["id"], pdf_path) or {**report_record, "report_path": pdf_path}
+
+    raw_data = report_data.get("raw_data", {})
+    storage.create_report_data(
+        report_id=report_record["id"],
+        company_info=json.dumps(raw_data.get("company_info", {}), default=str),
+        financial_data=json.dumps(raw_data.get("financials", {}), default=str),
+        risk_data=json.dumps(raw_data.get("risks", {}), default=str),
+        news_data=json.dumps(raw_data.get("news", {}), default=str)
+    )
+    return report_record
+
+
+class ResearchJobQueue:
+    """Bounded queue of research jobs drained by a fixed pool of worker threads"""
+
+    def __init__(self, workers: int, max_queued: int, history_size: int):
+        self.workers = workers
+        self._queue: "queue.Queue[ResearchJob]" = queue.Queue(maxsize=max_queued)
+        self._jobs: TTLCache[ResearchJob] = TTLCache(max_size=history_size, ttl_seconds=86400)
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+
+    def _ensure_workers(self):
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"research-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, query: str) -> ResearchJob:
+        self._ensure_workers()
+        job = ResearchJob(query=query)
+        self._jobs.set(job.id, job)
+        job.emit(QUEUED)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._jobs.pop(job.id)
+            raise QueueFullError("Research queue is full, please try again shortly")
+        return job
+
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        return self._jobs.get(job_id)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job: ResearchJob):
+        job.status = RUNNING
+        job.emit("started")
+        try:
+            result = orchestrate_research(job.query, on_event=job.emit)
+
+            if not result.get("success"):
+                job.error = result.get("error", "Research failed")
+                job.status = FAILED
+                job.emit("error", {"message": job.error})
+                return
+
+            report_data = result.get("data", {})
+            job.company = f"{report_data.get('company_name')} ({report_data.get('ticker')})"
+
+            job.emit("rendering", {"company": job.company})
+            record = save_research_report(report_data, job.query, job.company, report_id=job.id)
+
+            job.report_path = record["report_path"]
+            job.status = DONE
+            job.emit("complete", {"company": job.company, "report_path": job.report_path, "stages": job.stages})
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+            job.emit("error", {"message": job.error})
+
+
+research_queue = ResearchJobQueue(
+    workers=settings.research_workers,
+    max_queued=settings.research_queue_size,
+    history_size=settings.research_job_history
+)
@@ -1,12 +1,18 @@
 import os
+import json
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
 from reportlab.lib.colors import HexColor
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+from app.config.settings import get_settings
 
 
 # Detect if running in serverless environment (Vercel)
@@ -22,6 +28,12 @@ else:
 
 os.makedirs(REPORTS_DIR, exist_ok=True)
 
+# reportlab holds the GIL while laying out a document, so rendering runs in worker processes
+PDF_WORKERS = 0 if IS_SERVERLESS else get_settings().pdf_workers
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
 # Colors
 PRIMARY = HexColor("#1a1a2e")
 SECONDARY = HexColor("#16213e")
@@ -326,6 +338,9 @@ def generate_report(data: Dict[str, Any], report_id: str) -> str:
                 ["Risk Factor", "Value"],
                 ["Beta (Volatility)", str(risks.get("beta", "N/A"))],
                 ["Annualized Volatility", f"{risks.get('volatility_percent', 'N/A')}%"],
+                ["Max Drawdown (1Y)", f"{risks.get('max_drawdown_percent', 'N/A')}%"],
+                ["1-Day VaR (95%)", f"{risks.get('var_percent', 'N/A')}%"],
+                ["Sharpe Ratio", str(risks.get("sharpe_ratio", "N/A"))],
                 ["Short % of Float", format_percent(risks.get("short_percent_of_float"))],
                 ["Debt to Equity", str(risks.get("debt_to_equity", "N/A"))],
                 ["Current Ratio", str(risks.get("current_ratio", "N/A"))],
@@ -449,3 +464,53 @@ def generate_report(data: Dict[str, Any], report_id: str) -> str:
     doc.build(story)
     
     return f"/reports/{filename}"
+
+
+def build_render_payload(data: Dict[str, Any]) -> str:
+    """Serialize only the fields generate_report reads, once, as the message sent to a render worker"""
+    raw_data = data.get("raw_data", {})
+    price_data = {k: v for k, v in (data.get("price_data") or {}).items() if k not in ("prices", "columns")}
+    payload = {
+        "ticker": data.get("ticker"),
+        "company_name": data.get("company_name"),
+        "analysis": data.get("analysis", {}),
+        "raw_data": {key: raw_data.get(key, {}) for key in ("financials", "risks", "news")},
+        "price_data": price_data,
+        "portfolio_context": {"holdings": (data.get("portfolio_context") or {}).get("holdings", [])},
+    }
+    return json.dumps(payload, separators=(",", ":"), default=str)
+
+
+def _render_payload(payload: str, report_id: str) -> str:
+    return generate_report(json.loads(payload), report_id)
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _render_pool
+
+
+def _reset_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+
+
+def render_report(data: Dict[str, Any], report_id: str) -> str:
+    """Render the PDF in the worker process pool and block until it is written. Returns its URL path."""
+    payload = build_render_payload(data)
+    if PDF_WORKERS <= 0:
+        return _render_payload(payload, report_id)
+    try:
+        return _get_render_pool().submit(_render_payload, payload, report_id).result()
+    except BrokenProcessPool:
+        _reset_render_pool()
+        return _render_payload(payload, report_id)
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, HTTPException
-import json
+from starlette.concurrency import run_in_threadpool
 from app.schemas.request_schemas import FeedbackRequest, FeedbackResponse
-from app.db import file_storage as storage
+from app.db.storage import get_storage
 from app.agents.orchestrator import orchestrate_research
-from app.reports.generator import generate_report
+from app.jobs.research_jobs import save_research_report
 
 router = APIRouter()
+storage = get_storage()
 
 
 @router.post("/feedback", response_model=FeedbackResponse)
@@ -31,7 +32,7 @@ async def submit_feedback(request: FeedbackRequest):
     new_query = f"{ticker} - {request.feedback}"
     
     try:
-        result = orchestrate_research(new_query)
+        result = await run_in_threadpool(orchestrate_research, new_query)
         
         if not result.get("success"):
             return FeedbackResponse(
@@ -43,39 +44,13 @@ async def submit_feedback(request: FeedbackRequest):
         
         report_data = result.get("data", {})
         
-        # Create new query record
-        query_record = storage.create_query(
-            request=f"Feedback on {request.report_id}: {request.feedback}",
-            company=company
-        )
-        
-        # Create new report
-        report_record = storage.create_report(
-            query_id=query_record["id"],
-            company=company,
-            report_path="pending"
-        )
-        
-        # Generate PDF
-        pdf_path = generate_report(report_data, report_record["id"])
-        
-        # Update report path
-        reports = storage.load_json(storage.REPORTS_FILE)
-        for r in reports:
-            if r["id"] == report_record["id"]:
-                r["report_path"] = pdf_path
-                break
-        storage.save_json(storage.REPORTS_FILE, reports)
-        
-        # Store raw data
-        raw_data = report_data.get("raw_data", {})
-        storage.create_report_data(
-            report_id=report_record["id"],
-            company_info=json.dumps(raw_data.get("company_info", {}), default=str),
-            financial_data=json.dumps(raw_data.get("financials", {}), default=str),
-            risk_data=json.dumps(raw_data.get("risks", {}), default=str),
-            news_data=json.dumps(raw_data.get("news", {}), default=str)
+        report_record = await run_in_threadpool(
+            save_research_report,
+            report_data,
+            f"Feedback on {request.report_id}: {request.feedback}",
+            company
         )
+        pdf_path = report_record["report_path"]
         
         return FeedbackResponse(
             success=True,
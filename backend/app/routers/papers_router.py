@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException
 from typing import List
-from app.db import file_storage as storage
+from app.db.storage import get_storage
 
 router = APIRouter()
+storage = get_storage()
 
 
 @router.get("/papers")
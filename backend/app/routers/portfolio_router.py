@@ -1,9 +1,18 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import List, Optional
-from app.db.file_storage import (
-    load_json, save_json, DATA_DIR
-)
+from typing import Any, AsyncGenerator, Dict, List, Optional
+import numpy as np
+from app.config.paths import DATA_DIR
+from app.db.file_storage import load_json, save_json
+from app.analytics.history import portfolio_history
+from app.analytics.live import live_valuation, live_feed
+from app.analytics.risk import portfolio_risk
+from app.analytics.scoring import score_portfolio, generate_rating_narrative
+from app.analytics.valuation import value_holdings
+from app.data.quotes import get_quote_table
+from app.utils.sse import format_event, sse_response, KEEPALIVE, STREAM_KEEPALIVE_SECONDS
 import os
 import uuid
 from datetime import datetime
@@ -38,6 +47,25 @@ def save_portfolio(holdings: List[dict]):
     save_json(PORTFOLIO_FILE, holdings)
 
 
+def sync_live_position(ticker: str, shares: Optional[float]):
+    """Mirror a holdings change into the live valuation, if it has been loaded; shares=None removes"""
+    if not live_valuation.loaded:
+        return
+    if shares is None:
+        live_valuation.remove(ticker)
+    elif ticker in live_valuation:
+        live_valuation.set_position(ticker, shares)
+    else:
+        quotes = get_quote_table([ticker])
+        price = float(quotes.prices[0]) if np.isfinite(quotes.prices[0]) else 0.0
+        live_valuation.set_position(ticker, shares, price, quotes.profiles[0].get("sector"))
+
+
+async def ensure_live_valuation():
+    if not live_valuation.loaded:
+        await run_in_threadpool(live_valuation.load, get_portfolio())
+
+
 @router.get("/portfolio", response_model=PortfolioResponse)
 async def list_holdings():
     holdings = get_portfolio()
@@ -66,6 +94,7 @@ async def add_holding(holding: Holding):
     
     holdings.append(new_holding)
     save_portfolio(holdings)
+    await run_in_threadpool(sync_live_position, new_holding["ticker"], new_holding["shares"])
     
     return {"success": True, "holding": new_holding}
 
@@ -82,6 +111,7 @@ async def update_holding(ticker: str, update: HoldingUpdate):
     holding["updated_at"] = datetime.now().isoformat()
     
     save_portfolio(holdings)
+    await run_in_threadpool(sync_live_position, holding["ticker"], update.shares)
     
     return {"success": True, "holding": holding}
 
@@ -97,57 +127,136 @@ async def delete_holding(ticker: str):
         raise HTTPException(status_code=404, detail=f"No holding found for {ticker}")
     
     save_portfolio(holdings)
+    await run_in_threadpool(sync_live_position, ticker.upper(), None)
     
     return {"success": True, "message": f"Removed {ticker} from portfolio"}
 
 
 @router.get("/portfolio/summary")
 async def get_portfolio_summary():
-    """Get portfolio summary with current prices"""
-    from app.agents.tools import get_financials
-    
+    """Get portfolio summary with current prices, from one batch quote for all holdings"""
     holdings = get_portfolio()
     
     if not holdings:
         return {
             "holdings": [],
             "total_value": 0,
-            "total_holdings": 0
+            "total_holdings": 0,
+            "sectors": {}
         }
     
-    enriched = []
-    total_value = 0
+    return await run_in_threadpool(value_holdings, holdings)
+
+
+@router.get("/portfolio/risk")
+async def get_portfolio_risk(period: str = "1y"):
+    """Risk metrics for every holding and the whole portfolio from local price history"""
+    holdings = get_portfolio()
+    if not holdings:
+        return {"holdings": {}, "portfolio": None, "excluded": [], "period": period}
+    
+    shares = {h["ticker"]: h["shares"] for h in holdings}
+    try:
+        result = await run_in_threadpool(portfolio_risk, shares, period)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {**result, "period": period}
+
+
+@router.get("/portfolio/history")
+async def get_portfolio_history(period: str = "1y", max_points: Optional[int] = Query(None, ge=3, le=10000)):
+    """
+    Value of the current holdings over a past period from local price history, with
+    cumulative return, drawdown and rolling volatility series.
+    """
+    holdings = get_portfolio()
+    if not holdings:
+        return {"period": period, "total_points": 0, "excluded": [], "series": None}
     
+    shares: Dict[str, float] = {}
     for h in holdings:
+        shares[h["ticker"].upper()] = shares.get(h["ticker"].upper(), 0) + h["shares"]
+    try:
+        return await run_in_threadpool(portfolio_history, shares, period, max_points=max_points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/portfolio/ratings")
+async def get_portfolio_ratings(narrative: bool = True, period: str = "1y"):
+    """
+    Score every holding and the portfolio on diversification, concentration, valuation,
+    risk and momentum, with one AI narrative on the aggregate result.
+    """
+    holdings = get_portfolio()
+    if not holdings:
+        return {"portfolio": None, "holdings": [], "narrative": None}
+    
+    try:
+        ratings = await run_in_threadpool(score_portfolio, holdings, period)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    ratings["narrative"] = await run_in_threadpool(generate_rating_narrative, ratings) if narrative else None
+    return ratings
+
+
+@router.get("/portfolio/live")
+async def get_live_valuation():
+    """Current state of the incrementally maintained valuation"""
+    await ensure_live_valuation()
+    return live_valuation.snapshot()
+
+
+async def stream_live_valuation() -> AsyncGenerator[str, None]:
+    """
+    Relay live valuation changes as server-sent events: a snapshot first, then deltas.
+    Deltas queued for a slow client are coalesced to the latest per ticker, and a new
+    snapshot supersedes everything queued before it.
+    """
+    loop = asyncio.get_running_loop()
+    pending: Dict[str, Dict[str, Any]] = {}
+    ready = asyncio.Event()
+    
+    def collect(event: Dict[str, Any]):
+        if event["step"] == "snapshot":
+            pending.clear()
+            key = "*"
+        else:
+            key = event["ticker"]
+            pending.pop(key, None)
+        pending[key] = event
+        ready.set()
+    
+    def forward(event: Dict[str, Any]):
         try:
-            financials = get_financials(h["ticker"])
-            current_price = financials.get("current_price", 0) or 0
-            value = current_price * h["shares"]
-            total_value += value
-            
-            enriched.append({
-                **h,
-                "current_price": current_price,
-                "value": value,
-                "sector": financials.get("sector", "Unknown"),
-                "industry": financials.get("industry", "Unknown")
-            })
-        except:
-            enriched.append({
-                **h,
-                "current_price": 0,
-                "value": 0,
-                "sector": "Unknown",
-                "industry": "Unknown"
-            })
-    
-    for h in enriched:
-        h["weight"] = (h["value"] / total_value * 100) if total_value > 0 else 0
+            loop.call_soon_threadsafe(collect, event)
+        except RuntimeError:
+            # The client went away and its event loop is closed
+            pass
     
-    return {
-        "holdings": enriched,
-        "total_value": total_value,
-        "total_holdings": len(enriched)
-    }
+    snapshot = live_valuation.subscribe(forward)
+    live_feed.start()
+    try:
+        yield format_event({"step": "snapshot", **snapshot})
+        while True:
+            try:
+                await asyncio.wait_for(ready.wait(), timeout=STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield KEEPALIVE
+                continue
+            ready.clear()
+            events = list(pending.values())
+            pending.clear()
+            for event in events:
+                yield format_event(event)
+    finally:
+        live_valuation.unsubscribe(forward)
 
 
+@router.get("/portfolio/live/stream")
+async def stream_live_portfolio():
+    """Stream the live valuation: a snapshot, then a delta whenever a price or position changes"""
+    await ensure_live_valuation()
+    return sse_response(stream_live_valuation())
@@ -1,121 +1,105 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
-import json
+from starlette.concurrency import run_in_threadpool
 import asyncio
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Dict, Any, Literal, Optional
 from app.schemas.request_schemas import ResearchRequest, ResearchResponse
-from app.agents.orchestrator import orchestrate_research
 from app.agents.tools import get_price_history, get_company_info
 from app.utils.validation import resolve_company_to_ticker, parse_user_query
-from app.reports.generator import generate_report
-from app.db import file_storage as storage
+from app.db.storage import get_storage
+from app.jobs.research_jobs import research_queue, ResearchJob, QueueFullError, DONE, FAILED, TERMINAL_STEPS
+from app.utils.sse import format_event, sse_response, KEEPALIVE, STREAM_KEEPALIVE_SECONDS
 
 router = APIRouter()
+storage = get_storage()
 
 
 @router.post("/research", response_model=ResearchResponse)
 async def create_research_report(request: ResearchRequest):
+    """Queue a research report; poll /research/status/{report_id} for progress"""
     try:
-        result = orchestrate_research(request.query)
-        
-        if not result.get("success"):
-            return ResearchResponse(
-                success=False,
-                message=result.get("error", "Research failed"),
-                report_id=None,
-                report_path=None,
-                company=None
-            )
-        
-        report_data = result.get("data", {})
-        ticker = report_data.get("ticker")
-        company_name = report_data.get("company_name")
-        company_full = f"{company_name} ({ticker})"
-        
-        query_record = storage.create_query(request=request.query, company=company_full)
-        report_record = storage.create_report(query_id=query_record["id"], company=company_full, report_path="pending")
-        
-        pdf_path = generate_report(report_data, report_record["id"])
-        
-        reports = storage.load_json(storage.REPORTS_FILE)
-        for r in reports:
-            if r["id"] == report_record["id"]:
-                r["report_path"] = pdf_path
-                break
-        storage.save_json(storage.REPORTS_FILE, reports)
-        
-        raw_data = report_data.get("raw_data", {})
-        storage.create_report_data(
-            report_id=report_record["id"],
-            company_info=json.dumps(raw_data.get("company_info", {}), default=str),
-            financial_data=json.dumps(raw_data.get("financials", {}), default=str),
-            risk_data=json.dumps(raw_data.get("risks", {}), default=str),
-            news_data=json.dumps(raw_data.get("news", {}), default=str)
-        )
-        
-        return ResearchResponse(
-            success=True,
-            message=f"Research report generated for {company_name}",
-            report_id=report_record["id"],
-            report_path=pdf_path,
-            company=company_full
-        )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        job = research_queue.submit(request.query)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return ResearchResponse(
+        success=True,
+        message="Research report queued",
+        report_id=job.id,
+        report_path=None,
+        company=None,
+        status=job.status
+    )
 
 
-@router.get("/research/stream/{query}")
-async def stream_research(query: str):
-    """Stream research progress in real-time"""
+async def stream_job_events(job: ResearchJob) -> AsyncGenerator[str, None]:
+    """Relay a job's progress events as server-sent events until it completes or fails"""
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
     
-    async def generate_progress() -> AsyncGenerator[str, None]:
-        # Parse query
-        yield f"data: {json.dumps({'step': 'parsing', 'message': 'Parsing your request...'})}\n\n"
-        await asyncio.sleep(0.3)
-        
-        parsed = parse_user_query(query)
-        company_query = parsed["company_query"]
-        
-        # Resolve ticker
-        yield f"data: {json.dumps({'step': 'resolving', 'message': f'Finding ticker for {company_query}...'})}\n\n"
-        await asyncio.sleep(0.3)
-        
-        ticker, company_name, error = resolve_company_to_ticker(company_query)
-        
-        if error:
-            yield f"data: {json.dumps({'step': 'error', 'message': error})}\n\n"
-            return
-        
-        yield f"data: {json.dumps({'step': 'resolved', 'message': f'Found {company_name} ({ticker})', 'ticker': ticker, 'company': company_name})}\n\n"
-        await asyncio.sleep(0.3)
-        
-        # Fetch company info
-        yield f"data: {json.dumps({'step': 'fetching_company', 'message': 'Fetching company information...'})}\n\n"
-        company_info = get_company_info(ticker)
-        await asyncio.sleep(0.2)
-        
-        # Fetch price data
-        yield f"data: {json.dumps({'step': 'fetching_prices', 'message': 'Loading price history...'})}\n\n"
-        price_data = get_price_history(ticker, "1y")
-        await asyncio.sleep(0.2)
-        
-        yield f"data: {json.dumps({'step': 'complete', 'message': 'Data loaded', 'company_info': company_info, 'price_data': price_data})}\n\n"
+    def forward(event: Dict[str, Any]):
+        try:
+            loop.call_soon_threadsafe(events.put_nowait, event)
+        except RuntimeError:
+            # The client went away and its event loop is closed
+            pass
+    
+    backlog = job.subscribe(forward)
+    try:
+        for event in backlog:
+            yield format_event(event)
+            if event["step"] in TERMINAL_STEPS:
+                return
+        
+        while True:
+            try:
+                event = await asyncio.wait_for(events.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield KEEPALIVE
+                continue
+            yield format_event(event)
+            if event["step"] in TERMINAL_STEPS:
+                return
+    finally:
+        job.unsubscribe(forward)
+
+
+def event_stream_response(job: ResearchJob) -> StreamingResponse:
+    return sse_response(stream_job_events(job))
+
+
+@router.get("/research/events/{report_id}")
+async def stream_research_events(report_id: str):
+    """
+    Stream progress of a report queued with POST /research, replaying events emitted so far.
+    Jobs are only ever created by the POST, so a reconnecting EventSource cannot queue
+    duplicates; clients should close the stream on the "complete" or "error" event.
+    """
+    job = research_queue.get(report_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Research job not found")
     
-    return StreamingResponse(generate_progress(), media_type="text/event-stream")
+    return event_stream_response(job)
 
 
 @router.get("/research/preview/{query}")
-async def preview_research(query: str):
-    """Get quick preview data without full report"""
+async def preview_research(query: str, layout: Literal["rows", "columns"] = "rows",
+                           max_points: Optional[int] = Query(None, ge=3, le=10000)):
+    """
+    Get quick preview data without full report. layout="columns" returns compact price
+    arrays and max_points downsamples the chart series to at most that many days.
+    """
+    # Resolution and the first price store fill hit the network, so they run off the event loop
     parsed = parse_user_query(query)
-    ticker, company_name, error = resolve_company_to_ticker(parsed["company_query"])
+    ticker, company_name, error = await run_in_threadpool(resolve_company_to_ticker, parsed["company_query"])
     
     if error:
         raise HTTPException(status_code=400, detail=error)
     
-    company_info = get_company_info(ticker)
-    price_data = get_price_history(ticker, "1y")
+    company_info, price_data = await asyncio.gather(
+        run_in_threadpool(get_company_info, ticker),
+        run_in_threadpool(get_price_history, ticker, "1y", layout=layout, max_points=max_points)
+    )
     
     return {
         "ticker": ticker,
@@ -126,15 +110,23 @@ async def preview_research(query: str):
 
 
 @router.get("/research/status/{report_id}")
-async def get_research_status(report_id: int):
+async def get_research_status(report_id: str):
+    job = research_queue.get(report_id)
+    if job:
+        return job.to_dict()
+    
     report = storage.get_report(report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     
+    # With no live job left, a record still "pending" belongs to a render that never finished
+    rendered = report["report_path"] != "pending"
     return {
         "report_id": report["id"],
         "company": report["company"],
-        "status": "completed" if report["report_path"] != "pending" else "processing",
+        "status": DONE if rendered else FAILED,
         "created_at": report["created_at"],
-        "report_path": report["report_path"]
+        "report_path": report["report_path"] if rendered else None,
+        "error": None if rendered else "Report rendering did not finish",
+        "stages": {}
     }
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Query
+from app.data.symbol_index import get_symbol_index
+
+router = APIRouter()
+
+
+@router.get("/symbols/suggest")
+async def suggest_symbols(q: str = Query("", max_length=100), limit: int = Query(8, ge=1, le=25)):
+    """Ranked ticker suggestions for a partially typed company name or symbol"""
+    matches = get_symbol_index().suggest(q, limit=limit)
+    return {
+        "query": q,
+        "suggestions": [
+            {
+                "ticker": m.listing.symbol,
+                "company_name": m.listing.name,
+                "match": m.match,
+                "score": m.score
+            }
+            for m in matches
+        ]
+    }
@@ -14,6 +14,7 @@ class ResearchResponse(BaseModel):
     report_id: Optional[str] = None
     report_path: Optional[str] = None
     company: Optional[str] = None
+    status: Optional[str] = None
 
 
 class FeedbackRequest(BaseModel):
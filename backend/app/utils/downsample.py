@@ -0,0 +1,63 @@
+from typing import Dict, Optional, Sequence
+import numpy as np
+
+# Point counts precomputed for each series, finest first
+PYRAMID_LEVELS: Sequence[int] = (4096, 2048, 1024, 512, 256, 128, 64)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each of threshold - 2 equal buckets in
+    between, the point forming the largest triangle with the previously kept point
+    and the average of the next bucket, which preserves the visual shape of a line.
+
+    Returns:
+        Sorted indices of the kept points (all indices if no reduction is needed)
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype="f8")
+    y = np.asarray(y, dtype="f8")
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            avg_x = x[end:edges[i + 2]].mean()
+            avg_y = y[end:edges[i + 2]].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+
+def build_pyramid(x: np.ndarray, y: np.ndarray, levels: Sequence[int] = PYRAMID_LEVELS) -> Dict[int, np.ndarray]:
+    """
+    Indices into the series for every level smaller than it. Each level is downsampled
+    from the next finer one, so a full pyramid costs little more than its finest level.
+    """
+    pyramid: Dict[int, np.ndarray] = {}
+    source = np.arange(len(x))
+    for level in sorted(levels, reverse=True):
+        if level >= len(source):
+            continue
+        source = source[lttb(x[source], y[source], level)]
+        pyramid[level] = source
+    return pyramid
+
+
+def pick_level(pyramid: Dict[int, np.ndarray], max_points: int) -> Optional[np.ndarray]:
+    """Indices of the finest level with at most max_points, or None if every level is larger"""
+    fitting = [level for level in pyramid if level <= max_points]
+    return pyramid[max(fitting)] if fitting else None
@@ -1,17 +1,176 @@
-from openai import OpenAI
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future
+from openai import OpenAI, AsyncOpenAI
 from app.config.settings import get_settings
-from typing import Optional, Dict, Any
+from app.config.paths import DATA_DIR
+from app.utils.cache import PersistentCache
+from typing import Optional, Dict, Any, List, Coroutine, TypeVar, AsyncIterator
+
+T = TypeVar("T")
 
 settings = get_settings()
 client = OpenAI(api_key=settings.openai_api_key)
 
+# Completions keyed on a hash of everything sent to the API, shared across processes and restarts
+response_cache = PersistentCache(
+    os.path.join(DATA_DIR, "llm_cache.sqlite3"),
+    table="responses",
+    ttl_seconds=settings.llm_cache_ttl_seconds,
+    max_entries=settings.llm_cache_max_entries
+)
+
+
+def completion_cache_key(model: str, messages: List[Dict[str, str]], **params: Any) -> str:
+    """Content address for a completion request"""
+    payload = json.dumps({"model": model, "messages": messages, "params": params}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_enabled(use_cache: bool) -> bool:
+    return use_cache and settings.llm_cache_enabled
+
+
+def call_chat(
+    messages: List[Dict[str, str]],
+    model: str = "gpt-4o-mini",
+    temperature: float = 0.7,
+    max_tokens: int = 2000,
+    use_cache: bool = True
+) -> str:
+    """
+    Call the chat completions API synchronously, serving repeated requests from the response cache.
+    Runs acall_chat on the shared LLM loop, so it takes one of the llm_max_concurrency slots;
+    never call it from a coroutine already running on that loop.
+    
+    Args:
+        messages: Chat messages to send
+        model: OpenAI model to use
+        temperature: Creativity level (0-1)
+        max_tokens: Maximum tokens in response
+        use_cache: Set to False to bypass the response cache and force a fresh completion
+        
+    Returns:
+        The generated text response
+    """
+    return run_llm(acall_chat(
+        messages, model=model, temperature=temperature, max_tokens=max_tokens, use_cache=use_cache
+    ))
+
+
+# All async completions run on one long-lived loop so the AsyncOpenAI connection pool
+# and the in-flight semaphore are shared by every report, whichever thread started it
+_llm_loop: Optional[asyncio.AbstractEventLoop] = None
+_llm_loop_lock = threading.Lock()
+_async_client: Optional[AsyncOpenAI] = None
+_completion_slots: Optional[asyncio.Semaphore] = None
+
+
+def _get_llm_loop() -> asyncio.AbstractEventLoop:
+    global _llm_loop, _async_client, _completion_slots
+    with _llm_loop_lock:
+        if _llm_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-loop", daemon=True).start()
+            _async_client = AsyncOpenAI(api_key=settings.openai_api_key)
+            _completion_slots = asyncio.Semaphore(settings.llm_max_concurrency)
+            _llm_loop = loop
+        return _llm_loop
+
+
+def submit_llm(coro: Coroutine[Any, Any, T]) -> "Future[T]":
+    """Schedule a coroutine on the shared LLM loop and return a thread-safe future"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_llm_loop())
+
+
+def run_llm(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on the shared LLM loop and block until it finishes"""
+    return submit_llm(coro).result()
+
+
+async def acall_chat(
+    messages: List[Dict[str, str]],
+    model: str = "gpt-4o-mini",
+    temperature: float = 0.7,
+    max_tokens: int = 2000,
+    use_cache: bool = True
+) -> str:
+    """
+    Call the chat completions API asynchronously. Must run on the shared LLM loop
+    (use submit_llm or run_llm); at most llm_max_concurrency calls are in flight at once.
+    Cache hits return without taking a slot; use_cache=False forces a fresh completion.
+    
+    Returns:
+        The generated text response
+    """
+    key = completion_cache_key(model, messages, temperature=temperature, max_tokens=max_tokens)
+    if _cache_enabled(use_cache):
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+    
+    async with _completion_slots:
+        response = await _async_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+    content = response.choices[0].message.content or ""
+    
+    if settings.llm_cache_enabled and content:
+        response_cache.set(key, content)
+    return content
+
+
+async def astream_chat(
+    messages: List[Dict[str, str]],
+    model: str = "gpt-4o-mini",
+    temperature: float = 0.7,
+    max_tokens: int = 2000,
+    use_cache: bool = True
+) -> AsyncIterator[str]:
+    """
+    Stream a chat completion as text deltas. Same loop, slot and cache rules as acall_chat;
+    a cache hit is yielded as a single chunk, and the full text is cached once the stream ends.
+    """
+    key = completion_cache_key(model, messages, temperature=temperature, max_tokens=max_tokens)
+    if _cache_enabled(use_cache):
+        cached = response_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    parts: List[str] = []
+    async with _completion_slots:
+        stream = await _async_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+
+    content = "".join(parts)
+    if settings.llm_cache_enabled and content:
+        response_cache.set(key, content)
+
 
 def call_openai(
     prompt: str,
     system_message: str = "You are a helpful financial research assistant.",
     model: str = "gpt-4o-mini",
     temperature: float = 0.7,
-    max_tokens: int = 2000
+    max_tokens: int = 2000,
+    use_cache: bool = True
 ) -> str:
     """
     Call OpenAI API with the given prompt
@@ -22,21 +181,22 @@ def call_openai(
         model: OpenAI model to use (default: gpt-4o-mini for cost efficiency)
         temperature: Creativity level (0-1)
         max_tokens: Maximum tokens in response
+        use_cache: Set to False to bypass the response cache
         
     Returns:
         The generated text response
     """
     try:
-        response = client.chat.completions.create(
-            model=model,
+        return call_chat(
             messages=[
                 {"role": "system", "content": system_message},
                 {"role": "user", "content": prompt}
             ],
+            model=model,
             temperature=temperature,
-            max_tokens=max_tokens
-        )
-        return response.choices[0].message.content.strip()
+            max_tokens=max_tokens,
+            use_cache=use_cache
+        ).strip()
     except Exception as e:
         raise Exception(f"OpenAI API error: {str(e)}")
 
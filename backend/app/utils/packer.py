@@ -0,0 +1,142 @@
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+EMPTY_VALUES = (None, "", "N/A", "n/a", "None", "Unknown")
+
+# Progressively coarser (max string chars, max list items, max dict keys) levels tried when a
+# section is over its allotment; the last is the floor every packed section is reserved
+SHRINK_LEVELS: List[Tuple[int, int, Optional[int]]] = [
+    (1500, 10, None), (800, 8, None), (400, 5, None), (200, 3, None), (100, 2, None), (60, 1, None),
+    (60, 1, 8), (40, 1, 3), (20, 1, 2),
+]
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding("o200k_base")
+                except Exception:
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with the local tokenizer, estimating from word pieces if it cannot be loaded"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN_PATTERN.findall(text))
+
+
+def compact(value: Any) -> Any:
+    """Drop empty, null and N/A fields recursively and trim float precision"""
+    if isinstance(value, dict):
+        cleaned = {}
+        for k, v in value.items():
+            v = compact(v)
+            if v in EMPTY_VALUES or v == {} or v == []:
+                continue
+            cleaned[k] = v
+        return cleaned
+    if isinstance(value, (list, tuple)):
+        return [v for v in (compact(v) for v in value) if v not in EMPTY_VALUES and v != {} and v != []]
+    if isinstance(value, float):
+        if value != value:
+            return None
+        return float(f"{value:.6g}")
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def dumps_compact(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def shrink(value: Any, max_chars: int, max_items: int, max_keys: Optional[int] = None) -> Any:
+    """Truncate long strings, lists and (if max_keys is set) dicts so a value fits a smaller budget"""
+    if isinstance(value, dict):
+        items = list(value.items())[:max_keys]
+        return {k: shrink(v, max_chars, max_items, max_keys) for k, v in items}
+    if isinstance(value, list):
+        return [shrink(v, max_chars, max_items, max_keys) for v in value[:max_items]]
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars].rsplit(" ", 1)[0] + "..."
+    return value
+
+
+def fit_value(value: Any, max_tokens: int) -> Tuple[Optional[str], int]:
+    """Serialize a compacted value within max_tokens, shrinking it if needed. Returns (text, tokens)."""
+    text = dumps_compact(value)
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text, tokens
+    for level in SHRINK_LEVELS:
+        text = dumps_compact(shrink(value, *level))
+        tokens = count_tokens(text)
+        if tokens <= max_tokens:
+            return text, tokens
+    return None, 0
+
+
+def pack_value(value: Any, budget: int) -> str:
+    """Compactly serialize a single value within a token budget"""
+    text, _ = fit_value(compact(value), budget)
+    return text or ""
+
+
+def pack_sections(data: Dict[str, Any], budget: int, priority: Sequence[str]) -> str:
+    """
+    Pack data sections into one compact block that fits a token budget.
+
+    Sections are filled in priority order (keys missing from priority come last).
+    Each section may use whatever the budget has left after reserving the floor
+    (most shortened form) of every lower-priority section, so trailing sections
+    are shortened rather than dropped. Only when the floors of all sections
+    together exceed the budget are sections dropped, always the lowest priority
+    first, until the rest fit.
+
+    Args:
+        data: Mapping of section name to JSON-serializable data
+        budget: Total token budget for the packed block
+        priority: Section names from most to least important
+
+    Returns:
+        One "name: {json}" line per included section
+    """
+    order = [k for k in priority if k in data] + [k for k in data if k not in priority]
+    sections = [(name, compact(data[name])) for name in order]
+    sections = [(name, value) for name, value in sections if value not in EMPTY_VALUES and value != {} and value != []]
+
+    # Per-line overhead: the "name: " header and the newline joining it to the previous line
+    newline = count_tokens("\n")
+    overheads = [count_tokens(f"{name}: ") + (newline if i else 0) for i, (name, _) in enumerate(sections)]
+    floors = [
+        overhead + count_tokens(dumps_compact(shrink(value, *SHRINK_LEVELS[-1])))
+        for overhead, (_, value) in zip(overheads, sections)
+    ]
+    while sections and sum(floors) > budget:
+        sections.pop()
+        floors.pop()
+
+    lines = []
+    remaining = budget
+    for i, (name, value) in enumerate(sections):
+        allotment = remaining - sum(floors[i + 1:]) - overheads[i]
+        text, tokens = fit_value(value, allotment)
+        lines.append(f"{name}: {text}")
+        remaining -= tokens + overheads[i]
+
+    return "\n".join(lines)
@@ -0,0 +1,21 @@
+import json
+from typing import Any, AsyncIterator, Dict
+from fastapi.responses import StreamingResponse
+
+# Seconds of silence after which a comment line is sent so proxies keep the stream open
+STREAM_KEEPALIVE_SECONDS = 15
+
+KEEPALIVE = ": keep-alive\n\n"
+
+
+def format_event(event: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(event, default=str)}\n\n"
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Stream already formatted server-sent events without proxy buffering"""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,15 +1,29 @@
-import yfinance as yf
+import os
 from typing import Tuple, Optional, Dict, Any
-from openai import OpenAI
+from yfinance.exceptions import YFTickerMissingError
 from app.config.settings import get_settings
+from app.data.snapshot import get_snapshot
+from app.data.symbol_index import get_symbol_index, normalize
+from app.config.paths import DATA_DIR
+from app.utils.cache import PersistentCache
+from app.utils.llm import call_chat
 
 settings = get_settings()
 
+# Normalized query -> resolved ticker, or the error for queries that resolve to nothing
+resolution_cache = PersistentCache(
+    os.path.join(DATA_DIR, "resolution_cache.sqlite3"),
+    table="resolutions",
+    ttl_seconds=settings.resolution_cache_ttl_seconds
+)
 
-def resolve_company_to_ticker(query: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+
+def resolve_company_to_ticker(query: str, use_cache: bool = True) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     """
-    Resolve a company name or ticker to a valid ticker symbol using AI.
+    Resolve a company name or ticker to a valid ticker symbol.
     Accepts: "Apple", "AAPL", "Taiwan Semiconductor", "TSMC", "that electric car company", etc.
+    The local symbol index answers most queries; only unknown tickers are validated online,
+    and only descriptive queries reach the LLM.
     
     Returns: (ticker, company_name, error_message)
     """
@@ -17,50 +31,56 @@ def resolve_company_to_ticker(query: str) -> Tuple[Optional[str], Optional[str],
     if not query:
         return None, None, "Empty query provided"
     
-    # Common mappings for instant resolution
-    instant_mappings = {
-        "tsmc": "TSM", "taiwan semiconductor": "TSM", "taiwan semi": "TSM",
-        "google": "GOOGL", "alphabet": "GOOGL",
-        "facebook": "META", "meta": "META",
-        "amazon": "AMZN", "apple": "AAPL", "microsoft": "MSFT",
-        "nvidia": "NVDA", "tesla": "TSLA",
-        "berkshire": "BRK-B", "berkshire hathaway": "BRK-B",
-        "jp morgan": "JPM", "jpmorgan": "JPM",
-        "johnson and johnson": "JNJ", "johnson & johnson": "JNJ",
-        "coca cola": "KO", "coca-cola": "KO",
-        "walmart": "WMT", "disney": "DIS", "netflix": "NFLX",
-        "adobe": "ADBE", "salesforce": "CRM", "intel": "INTC",
-        "amd": "AMD", "advanced micro devices": "AMD",
-        "paypal": "PYPL", "broadcom": "AVGO", "costco": "COST",
-        "pepsi": "PEP", "pepsico": "PEP", "oracle": "ORCL",
-        "cisco": "CSCO", "verizon": "VZ", "at&t": "T", "att": "T",
-        "nike": "NKE", "mcdonalds": "MCD", "starbucks": "SBUX",
-        "boeing": "BA", "goldman sachs": "GS", "morgan stanley": "MS",
-        "bank of america": "BAC", "wells fargo": "WFC",
-        "uber": "UBER", "lyft": "LYFT", "airbnb": "ABNB",
-        "snowflake": "SNOW", "palantir": "PLTR", "spotify": "SPOT",
-        "zoom": "ZM", "shopify": "SHOP", "coinbase": "COIN",
-    }
+    # Known listings (symbols, names, aliases, near-misspellings) resolve locally without network
+    symbol_index = get_symbol_index()
+    match = symbol_index.resolve(query)
+    if match:
+        return match.listing.symbol, match.listing.name, None
     
-    query_lower = query.lower().strip()
+    # Everything past this point costs network round-trips, so remember the outcome
+    key = normalize(query)
+    if use_cache:
+        cached = resolution_cache.get(key)
+        if cached is not None:
+            return cached["ticker"], cached["company_name"], cached["error"]
     
-    # Check instant mappings
-    if query_lower in instant_mappings:
-        ticker = instant_mappings[query_lower]
-        return validate_and_get_info(ticker)
+    (ticker, company_name, error), transient = _resolve_online(query, use_cache)
     
-    # Check if it looks like a ticker (1-5 uppercase letters)
+    if ticker:
+        resolution_cache.set(key, {"ticker": ticker, "company_name": company_name, "error": None})
+    elif not transient:
+        # Misses are kept briefly so repeated gibberish is cheap but new listings are picked up soon
+        resolution_cache.set(
+            key, {"ticker": None, "company_name": None, "error": error},
+            ttl_seconds=settings.resolution_negative_ttl_seconds
+        )
+    return ticker, company_name, error
+
+
+def _resolve_online(query: str, use_cache: bool) -> Tuple[Tuple[Optional[str], Optional[str], Optional[str]], bool]:
+    """
+    Resolve a query the index does not know, by validating it as a ticker and then asking the LLM.
+    Returns ((ticker, company_name, error), transient) where transient means a lookup failed
+    for reasons other than the symbol not existing, so a miss must not be cached.
+    """
+    symbol_index = get_symbol_index()
+    transient = False
+    
+    # Check if it looks like a ticker (1-5 letters); a lowercase common word ("dow", "now")
+    # is more likely meant as a word, so it goes to the LLM instead
     potential_ticker = query.upper().replace(" ", "").replace(".", "")
-    if len(potential_ticker) <= 5 and potential_ticker.isalpha():
-        result = validate_and_get_info(potential_ticker)
-        if result[0]:
-            return result
+    looks_like_word = not query.isupper() and normalize(query) in symbol_index.common_words
+    if len(potential_ticker) <= 5 and potential_ticker.isalpha() and not looks_like_word:
+        try:
+            company_name = lookup_quote(potential_ticker)
+            if company_name:
+                return (potential_ticker, company_name, None), False
+        except Exception:
+            transient = True
     
     # Use AI to resolve vague queries
     try:
-        client = OpenAI(api_key=settings.openai_api_key)
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        ai_ticker = call_chat(
             messages=[{
                 "role": "user",
                 "content": f"""What is the stock ticker symbol for: "{query}"
@@ -79,31 +99,42 @@ Examples:
 Your response (ticker only):"""
             }],
             max_tokens=10,
-            temperature=0
-        )
-        
-        ai_ticker = response.choices[0].message.content.strip().upper()
+            temperature=0,
+            use_cache=use_cache
+        ).strip().upper()
         
         if ai_ticker and ai_ticker != "UNKNOWN" and len(ai_ticker) <= 5:
-            result = validate_and_get_info(ai_ticker)
-            if result[0]:
-                return result
-    except:
-        pass
+            listing = symbol_index.get(ai_ticker)
+            if listing:
+                return (listing.symbol, listing.name, None), False
+            company_name = lookup_quote(ai_ticker)
+            if company_name:
+                return (ai_ticker, company_name, None), False
+    except Exception:
+        transient = True
     
-    return None, None, f"Could not find a valid ticker for '{query}'. Try using the stock symbol directly (e.g., AAPL, MSFT, TSM)."
+    error = f"Could not find a valid ticker for '{query}'. Try using the stock symbol directly (e.g., AAPL, MSFT, TSM)."
+    return (None, None, error), transient
+
+
+def lookup_quote(ticker: str) -> Optional[str]:
+    """
+    Company name for a ticker from the price chart metadata, or None if Yahoo has no such symbol.
+    One small chart request instead of the full .info payload; network errors are raised.
+    """
+    stock = get_snapshot(ticker).stock
+    try:
+        stock.history(period="5d", interval="1d", raise_errors=True)
+    except YFTickerMissingError:
+        return None
+    metadata = stock.history_metadata or {}
+    return metadata.get("longName") or metadata.get("shortName")
 
 
 def validate_and_get_info(ticker: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
-    """Validate ticker and get company name"""
+    """Validate ticker and get company name with a lightweight quote lookup"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        if not info:
-            return None, None, f"No data found for ticker '{ticker}'"
-        
-        company_name = info.get('longName') or info.get('shortName') or info.get('displayName')
+        company_name = lookup_quote(ticker)
         
         if not company_name:
             return None, None, f"'{ticker}' does not appear to be a valid stock"
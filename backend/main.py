@@ -3,7 +3,7 @@ import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from app.routers import research_router, papers_router, feedback_router, portfolio_router
+from app.routers import research_router, papers_router, feedback_router, portfolio_router, symbols_router
 
 app = FastAPI(title="Stock Research API", version="1.0.0")
 
@@ -32,6 +32,7 @@ app.include_router(research_router.router, prefix="/api", tags=["research"])
 app.include_router(papers_router.router, prefix="/api", tags=["papers"])
 app.include_router(feedback_router.router, prefix="/api", tags=["feedback"])
 app.include_router(portfolio_router.router, prefix="/api", tags=["portfolio"])
+app.include_router(symbols_router.router, prefix="/api", tags=["symbols"])
 
 
 @app.get("/")
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.analytics.covariance import covariance_matrix
+from app.analytics.risk import TRADING_DAYS
+
+
+def test_covariance_matrix_matches_pandas():
+    rng = np.random.default_rng(3)
+    common = rng.normal(0, 0.01, (250, 1))
+    returns = common + rng.normal(0, 0.008, (250, 4))
+    covariance, correlation = covariance_matrix(returns)
+    frame = pd.DataFrame(returns)
+    assert covariance == pytest.approx(frame.cov().to_numpy() * TRADING_DAYS, rel=1e-9)
+    assert correlation == pytest.approx(frame.corr().to_numpy(), rel=1e-9)
+
+
+def test_covariance_matrix_zeroes_correlation_of_a_flat_series():
+    returns = np.column_stack([np.linspace(-0.01, 0.01, 30), np.zeros(30)])
+    _, correlation = covariance_matrix(returns)
+    assert correlation[0, 1] == 0 and correlation[1, 1] == 0
+
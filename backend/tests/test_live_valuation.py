@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from app.analytics.live import LiveValuation, PriceTickSimulator
+
+SECTORS = ("Technology", "Healthcare", "Energy")
+
+
+def recompute(valuation: LiveValuation):
+    """Total, per-holding weights and sector weights from scratch, for comparison with the running figures"""
+    holdings = valuation.snapshot()["holdings"]
+    values = {h["ticker"]: h["shares"] * h["price"] for h in holdings}
+    total = sum(values.values())
+    sectors = {}
+    for h in holdings:
+        sectors[h["sector"]] = sectors.get(h["sector"], 0.0) + values[h["ticker"]]
+    return (
+        total,
+        {t: v / total * 100 for t, v in values.items()},
+        {name: v / total * 100 for name, v in sectors.items()},
+    )
+
+
+def assert_consistent(valuation: LiveValuation):
+    snapshot = valuation.snapshot()
+    total, weights, sector_weights = recompute(valuation)
+    assert snapshot["total_value"] == pytest.approx(total, rel=1e-9)
+    assert {h["ticker"]: h["weight"] for h in snapshot["holdings"]} == pytest.approx(weights, rel=1e-9)
+    assert {name: s["weight"] for name, s in snapshot["sectors"].items()} == pytest.approx(sector_weights, rel=1e-9)
+
+
+def test_incremental_totals_match_full_recompute():
+    rng = np.random.default_rng(7)
+    # A large resync interval so every figure below comes from the O(1) updates
+    valuation = LiveValuation(resync_every=10 ** 9)
+    simulator = PriceTickSimulator(valuation, interval=3600, volatility=0.8, tick_fraction=0.5, seed=42)
+
+    tickers = [f"T{i:02d}" for i in range(40)]
+    for ticker in tickers:
+        valuation.set_position(ticker, float(rng.integers(1, 500)), float(rng.uniform(5, 500)),
+                               SECTORS[int(rng.integers(len(SECTORS)))])
+    assert_consistent(valuation)
+
+    held = list(tickers)
+    for step in range(300):
+        deltas = simulator.step()
+        assert deltas
+        for delta in deltas:
+            assert delta["price"] == valuation.price(delta["ticker"])
+
+        if step % 25 == 0:
+            removed = held.pop(int(rng.integers(len(held))))
+            assert valuation.remove(removed)["removed"]
+            assert removed not in valuation
+        if step % 10 == 0:
+            ticker = held[int(rng.integers(len(held)))]
+            delta = valuation.set_position(ticker, float(rng.integers(1, 500)))
+            assert delta["total_value"] == valuation.total_value
+        assert_consistent(valuation)
+
+    assert sorted(valuation.tickers()) == sorted(held)
+    assert len(valuation) == len(held)
+
+
+def test_simulator_is_deterministic_for_a_seed():
+    def run(seed: int):
+        valuation = LiveValuation()
+        for i, ticker in enumerate(("AAA", "BBB", "CCC", "DDD")):
+            valuation.set_position(ticker, 10.0, 100.0 + i, "Technology")
+        simulator = PriceTickSimulator(valuation, interval=3600, seed=seed)
+        for _ in range(50):
+            simulator.step()
+        return [valuation.price(t) for t in ("AAA", "BBB", "CCC", "DDD")]
+
+    assert run(1) == run(1)
+    assert run(1) != run(2)
+
+
+def test_subscribers_receive_deltas_in_version_order():
+    valuation = LiveValuation()
+    events = []
+    valuation.subscribe(events.append)
+    valuation.set_position("AAA", 10.0, 50.0, "Technology")
+    valuation.set_position("BBB", 5.0, 20.0, "Energy")
+    valuation.set_price("AAA", 55.0)
+    valuation.remove("BBB")
+
+    assert [e["version"] for e in events] == sorted(e["version"] for e in events)
+    assert events[-1]["removed"] and events[-1]["total_value"] == pytest.approx(550.0)
+    assert valuation.set_price("AAA", 55.0) is None
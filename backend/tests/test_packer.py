@@ -0,0 +1,62 @@
+import random
+import pytest
+from app.utils.packer import count_tokens, pack_sections
+
+PRIORITY = ("financials", "company_info", "risks", "news", "other", "portfolio")
+
+WORDS = "revenue margin growth cloud segment guidance outlook demand supply chain regulatory".split()
+
+
+def sections():
+    """Gathered data shaped like the research tools' output, each section far over a small budget"""
+    rng = random.Random(1)
+
+    def text(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n))
+
+    return {
+        "portfolio": {
+            "holdings": [{"ticker": f"T{i}", "shares": i, "sector": "Technology", "weight": 0.05} for i in range(20)],
+            "total_value": 1_000_000.0,
+            "sectors": {"Technology": 60.0, "Energy": 40.0},
+        },
+        "financials": {
+            **{f"metric_{i}": rng.uniform(-1e9, 1e9) for i in range(30)},
+            "statements": [{"year": 2020 + y, **{f"line_{j}": rng.uniform(0, 1e9) for j in range(12)}} for y in range(4)],
+        },
+        "company_info": {
+            "name": "Example Corp",
+            "sector": "Technology",
+            "description": text(300),
+            "officers": [{"name": f"Person {i}", "title": text(3)} for i in range(8)],
+            **{f"field_{i}": text(4) for i in range(15)},
+        },
+        "risks": {"beta": 1.2, "volatility": 0.3, "flags": [text(20) for _ in range(10)]},
+        "news": {"articles": [{"title": text(12), "summary": text(80), "source": "Wire"} for _ in range(10)]},
+        "other": {"topic": "patents", "notes": [text(40) for _ in range(6)]},
+    }
+
+
+def packed_names(text):
+    return [line.split(":", 1)[0] for line in text.splitlines()]
+
+
+@pytest.mark.parametrize("budget", [200, 800, 3000])
+def test_pack_sections_keeps_every_section_within_budget(budget):
+    packed = pack_sections(sections(), budget, PRIORITY)
+    assert count_tokens(packed) <= budget
+    assert packed_names(packed) == list(PRIORITY)
+
+
+def test_pack_sections_gives_spare_budget_to_higher_priorities():
+    packed = pack_sections(sections(), 800, PRIORITY)
+    lengths = {name: count_tokens(line) for name, line in zip(packed_names(packed), packed.splitlines())}
+    assert lengths["financials"] > lengths["portfolio"]
+
+
+@pytest.mark.parametrize("budget", [0, 30, 60, 100, 150])
+def test_pack_sections_drops_lowest_priority_first(budget):
+    packed = pack_sections(sections(), budget, PRIORITY)
+    assert count_tokens(packed) <= budget
+    names = packed_names(packed)
+    assert names == list(PRIORITY[:len(names)])
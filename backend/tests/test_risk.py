@@ -0,0 +1,53 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from app.analytics.risk import TRADING_DAYS, VAR_CONFIDENCE, compute_risk
+
+DAYS = 260
+
+
+def random_walk(rng: np.random.Generator, drift: float, volatility: float, start: float = 100.0) -> np.ndarray:
+    return start * np.cumprod(1 + rng.normal(drift, volatility, DAYS))
+
+
+@pytest.fixture(scope="module")
+def series():
+    """Two tickers and a benchmark on the same days; the second ticker lists 40 days in"""
+    rng = np.random.default_rng(11)
+    market = random_walk(rng, 0.0004, 0.01)
+    steady = market * random_walk(rng, 0.0001, 0.006, start=1.0)
+    late = random_walk(rng, -0.0002, 0.025)
+    late[:40] = np.nan
+    return np.column_stack([steady, late]), market
+
+
+def expected(closes: pd.Series, market: pd.Series) -> dict:
+    """The same metrics written directly in pandas"""
+    alpha = 1 - VAR_CONFIDENCE
+    returns = closes.pct_change(fill_method=None).dropna()
+    market_returns = market.pct_change(fill_method=None).loc[returns.index]
+    tail = max(math.ceil(alpha * len(returns)), 1)
+    closes = closes.dropna()
+    return {
+        "annual_volatility": returns.std() * math.sqrt(TRADING_DAYS),
+        "var": -returns.quantile(alpha),
+        "cvar": -returns.nsmallest(tail).mean(),
+        "max_drawdown": -(closes / closes.cummax() - 1).min(),
+        "beta": returns.cov(market_returns) / market_returns.var(),
+    }
+
+
+def test_compute_risk_matches_pandas(series):
+    closes, market = series
+    metrics = compute_risk(closes, benchmark=market)
+    market_series = pd.Series(market)
+    for column in range(closes.shape[1]):
+        reference = expected(pd.Series(closes[:, column]), market_series)
+        for name, value in reference.items():
+            assert metrics[name][column] == pytest.approx(value, rel=1e-9), (column, name)
+
+
+def test_compute_risk_is_nan_without_enough_history():
+    metrics = compute_risk(np.array([[100.0], [101.0]]), benchmark=np.array([50.0, 51.0]))
+    assert all(np.isnan(values[0]) for values in metrics.values())
@@ -0,0 +1,78 @@
+import pytest
+from app.data.symbol_index import get_symbol_index
+
+# The hard-coded company mappings the resolver started from; the index must keep answering them
+BASELINE_MAPPINGS = {
+    "tsmc": "TSM", "taiwan semiconductor": "TSM", "taiwan semi": "TSM",
+    "google": "GOOGL", "alphabet": "GOOGL",
+    "facebook": "META", "meta": "META",
+    "amazon": "AMZN", "apple": "AAPL", "microsoft": "MSFT",
+    "nvidia": "NVDA", "tesla": "TSLA",
+    "berkshire": "BRK-B", "berkshire hathaway": "BRK-B",
+    "jp morgan": "JPM", "jpmorgan": "JPM",
+    "johnson and johnson": "JNJ", "johnson & johnson": "JNJ",
+    "coca cola": "KO", "coca-cola": "KO",
+    "walmart": "WMT", "disney": "DIS", "netflix": "NFLX",
+    "adobe": "ADBE", "salesforce": "CRM", "intel": "INTC",
+    "amd": "AMD", "advanced micro devices": "AMD",
+    "paypal": "PYPL", "broadcom": "AVGO", "costco": "COST",
+    "pepsi": "PEP", "pepsico": "PEP", "oracle": "ORCL",
+    "cisco": "CSCO", "verizon": "VZ", "at&t": "T", "att": "T",
+    "nike": "NKE", "mcdonalds": "MCD", "starbucks": "SBUX",
+    "boeing": "BA", "goldman sachs": "GS", "morgan stanley": "MS",
+    "bank of america": "BAC", "wells fargo": "WFC",
+    "uber": "UBER", "lyft": "LYFT", "airbnb": "ABNB",
+    "snowflake": "SNOW", "palantir": "PLTR", "spotify": "SPOT",
+    "zoom": "ZM", "shopify": "SHOP", "coinbase": "COIN",
+}
+
+# Queries the index used to answer with the wrong company
+WRONG_MATCHES = {
+    "now": "DNOW",
+    "s and p 500": "SPGI",
+    "semis": "SEM",
+    "cloud": "NET",
+    "solar": "SEDG",
+    "chip": "CMG",
+    "tech": "TECH",
+    "dow": "DOW",
+    "a": "A",
+    "on": "ON",
+}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return get_symbol_index()
+
+
+@pytest.mark.parametrize("query,symbol", BASELINE_MAPPINGS.items())
+def test_baseline_mappings(index, query, symbol):
+    match = index.resolve(query)
+    assert match is not None and match.listing.symbol == symbol
+
+
+@pytest.mark.parametrize("query,wrong", WRONG_MATCHES.items())
+def test_common_words_are_not_guessed(index, query, wrong):
+    match = index.resolve(query)
+    assert match is None, f"{query!r} resolved to {match.listing.symbol} ({match.match}), not {wrong}"
+
+
+@pytest.mark.parametrize("query", ["macy", "macy's", "macys", "Macy's Inc"])
+def test_macys(index, query):
+    assert index.resolve(query).listing.symbol == "M"
+
+
+@pytest.mark.parametrize("query,symbol", [
+    ("NOW", "NOW"), ("ON", "ON"), ("A", "A"), ("TECH", "TECH"), ("DOW", "DOW"),
+    ("servicenow", "NOW"), ("Hims & Hers", "HIMS"), ("hims and hers", "HIMS"), ("msft", "MSFT"),
+])
+def test_explicit_queries(index, query, symbol):
+    assert index.resolve(query).listing.symbol == symbol
+
+
+def test_loose_matches_clear_their_cutoffs(index):
+    for query in ("cloudflare inc", "taiwan semiconductor manufacturing", "berkshire hath"):
+        match = index.resolve(query)
+        assert match is not None
+        assert match.match in ("alias", "name", "symbol") or match.score >= 0.6
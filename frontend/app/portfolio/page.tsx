@@ -17,6 +17,22 @@ interface Holding {
   created_at: string;
 }
 
+interface LiveHolding {
+  ticker: string;
+  price: number;
+  value: number;
+}
+
+interface LiveEvent {
+  step: 'snapshot' | 'delta';
+  total_value: number;
+  holdings?: LiveHolding[];
+  ticker?: string;
+  price?: number;
+  value?: number;
+  removed?: boolean;
+}
+
 interface PortfolioSummary {
   holdings: Holding[];
   total_value: number;
@@ -56,6 +72,34 @@ export default function PortfolioPage() {
     fetchPortfolio();
   }, []);
 
+  // Live prices: a snapshot, then one delta per changed holding; weights follow from the new total
+  useEffect(() => {
+    const source = new EventSource(`${API_BASE}/portfolio/live/stream`);
+    source.onmessage = (message) => {
+      const event: LiveEvent = JSON.parse(message.data);
+      if (event.step === 'snapshot' && event.holdings) {
+        applyLiveUpdates(event.holdings, event.total_value);
+      } else if (event.step === 'delta' && !event.removed && event.ticker) {
+        applyLiveUpdates([{ ticker: event.ticker, price: event.price || 0, value: event.value || 0 }], event.total_value);
+      }
+    };
+    return () => source.close();
+  }, []);
+
+  const applyLiveUpdates = (updates: LiveHolding[], total: number) => {
+    const byTicker = new Map(updates.map((u) => [u.ticker, u]));
+    setHoldings((current) => current.map((h) => {
+      const update = byTicker.get(h.ticker.toUpperCase());
+      const value = update ? update.value : h.value || 0;
+      return {
+        ...h,
+        ...(update ? { current_price: update.price, value: update.value } : {}),
+        weight: total > 0 ? (value / total) * 100 : 0,
+      };
+    }));
+    setTotalValue(total);
+  };
+
   const fetchPortfolio = async () => {
     setIsLoading(true);
     try {
@@ -19,6 +19,23 @@ interface CompanyInfo {
   logo_url: string;
 }
 
+interface SymbolSuggestion {
+  ticker: string;
+  company_name: string;
+  match: string;
+}
+
+// Separators that split the company from the rest of the request (mirrors parse_user_query)
+const QUERY_SEPARATORS = [' - ', ' -- ', ': ', ' | '];
+
+const splitQuery = (text: string): [string, string] => {
+  for (const sep of QUERY_SEPARATORS) {
+    const index = text.indexOf(sep);
+    if (index !== -1) return [text.slice(0, index), text.slice(index)];
+  }
+  return [text, ''];
+};
+
 interface ProgressStep {
   id: string;
   label: string;
@@ -45,6 +62,8 @@ export default function ResearchPage() {
   const [priceData, setPriceData] = useState<PricePoint[]>([]);
   const [progressSteps, setProgressSteps] = useState<ProgressStep[]>([]);
   const [currentStep, setCurrentStep] = useState('');
+  const [suggestions, setSuggestions] = useState<SymbolSuggestion[]>([]);
+  const [showSuggestions, setShowSuggestions] = useState(false);
   const canvasRef = useRef<HTMLCanvasElement>(null);
 
   const steps = [
@@ -64,6 +83,42 @@ export default function ResearchPage() {
     }
   }, [priceData]);
 
+  useEffect(() => {
+    const [companyPart, rest] = splitQuery(query);
+    const prefix = companyPart.trim();
+    if (!prefix || rest || isLoading) {
+      setSuggestions([]);
+      return;
+    }
+
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const res = await fetch(`${API_BASE}/symbols/suggest?q=${encodeURIComponent(prefix)}&limit=6`, {
+          signal: controller.signal,
+        });
+        if (res.ok) {
+          const data = await res.json();
+          setSuggestions(data.suggestions || []);
+        }
+      } catch {
+        // Aborted by a newer keystroke or the API is unreachable; keep free-text search working
+      }
+    }, 120);
+
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [query, isLoading]);
+
+  const selectSuggestion = (suggestion: SymbolSuggestion) => {
+    const [, rest] = splitQuery(query);
+    setQuery(suggestion.ticker + rest);
+    setSuggestions([]);
+    setShowSuggestions(false);
+  };
+
   const drawChart = () => {
     const canvas = canvasRef.current;
     if (!canvas || priceData.length === 0) return;
@@ -199,7 +254,7 @@ export default function ResearchPage() {
       updateProgress('fetching_company');
       
       try {
-        const previewRes = await fetch(`${API_BASE}/research/preview/${encodeURIComponent(query)}`);
+        const previewRes = await fetch(`${API_BASE}/research/preview/${encodeURIComponent(query)}?layout=columns&max_points=512`);
         if (previewRes.ok) {
           const preview = await previewRes.json();
           setCompanyInfo({
@@ -210,8 +265,9 @@ export default function ResearchPage() {
             market_cap: preview.company_info?.market_cap || 0,
             logo_url: `https://logo.clearbit.com/${preview.company_info?.website?.replace('https://', '').replace('http://', '').split('/')[0]}` || ''
           });
-          if (preview.price_data?.prices) {
-            setPriceData(preview.price_data.prices);
+          const columns = preview.price_data?.columns;
+          if (columns) {
+            setPriceData(columns.dates.map((date: string, i: number) => ({ date, close: columns.close[i] })));
           }
         }
       } catch {
@@ -235,16 +291,36 @@ export default function ResearchPage() {
         body: JSON.stringify({ query })
       });
 
-      updateProgress('creating_pdf');
-      await new Promise(r => setTimeout(r, 300));
-
       const data = await response.json();
 
       if (!response.ok || !data.success) {
         throw new Error(data.message || data.detail || 'Research failed');
       }
 
-      setReportPath(data.report_path);
+      // Follow the queued job's events; the stream is closed on its final event so the
+      // browser does not reconnect to a finished job
+      const reportPath = await new Promise<string>((resolve, reject) => {
+        const source = new EventSource(`${API_BASE}/research/events/${data.report_id}`);
+        source.onmessage = (message) => {
+          const event = JSON.parse(message.data);
+          if (event.step === 'rendering') {
+            updateProgress('creating_pdf');
+          } else if (event.step === 'complete') {
+            source.close();
+            resolve(event.report_path);
+          } else if (event.step === 'error') {
+            source.close();
+            reject(new Error(event.message || 'Research failed'));
+          }
+        };
+        source.onerror = () => {
+          if (source.readyState === EventSource.CLOSED) {
+            reject(new Error('Lost connection to the research job'));
+          }
+        };
+      });
+
+      setReportPath(reportPath);
       setProgressSteps(prev => prev.map(s => ({ ...s, completed: true })));
 
     } catch (err) {
@@ -296,7 +372,13 @@ export default function ResearchPage() {
             <input
               type="text"
               value={query}
-              onChange={(e) => setQuery(e.target.value)}
+              onChange={(e) => {
+                setQuery(e.target.value);
+                setShowSuggestions(true);
+              }}
+              onFocus={() => setShowSuggestions(true)}
+              onBlur={() => setTimeout(() => setShowSuggestions(false), 150)}
+              autoComplete="off"
               placeholder="Search any company... Apple, TSLA, or 'that AI chip company'"
               className="w-full px-5 py-4 pr-32 bg-white border border-neutral-200 rounded-2xl 
                        text-neutral-900 placeholder-neutral-400 text-lg
@@ -322,6 +404,23 @@ export default function ResearchPage() {
                 </span>
               ) : 'Research'}
             </button>
+            {showSuggestions && suggestions.length > 0 && (
+              <ul className="absolute z-10 left-0 right-0 mt-2 bg-white border border-neutral-200 rounded-2xl shadow-soft overflow-hidden">
+                {suggestions.map((suggestion) => (
+                  <li key={suggestion.ticker}>
+                    <button
+                      type="button"
+                      onMouseDown={(e) => e.preventDefault()}
+                      onClick={() => selectSuggestion(suggestion)}
+                      className="w-full flex items-center gap-3 px-5 py-2.5 text-left hover:bg-neutral-50 transition-colors"
+                    >
+                      <span className="w-16 font-semibold text-neutral-900">{suggestion.ticker}</span>
+                      <span className="text-neutral-500 truncate">{suggestion.company_name}</span>
+                    </button>
+                  </li>
+                ))}
+              </ul>
+            )}
           </div>
           <p className="mt-3 text-sm text-neutral-400 pl-1">
             Add context like "focus on dividends" or "growth potential" for tailored insights
@@ -19,9 +19,20 @@ export interface ResearchRequest {
 export interface ResearchResponse {
   success: boolean
   message: string
-  report_id?: number
+  report_id?: string
   report_path?: string
   company?: string
+  status?: ResearchStatus['status']
+}
+
+export interface ResearchStatus {
+  report_id: string
+  status: 'queued' | 'running' | 'done' | 'failed'
+  company?: string
+  created_at: string
+  report_path?: string
+  error?: string
+  stages: Record<string, { started_at: string; duration_ms: number | null }>
 }
 
 export interface FeedbackRequest {
@@ -64,7 +75,7 @@ export const researchApi = {
   },
 
   // Get research status
-  getResearchStatus: async (reportId: number) => {
+  getResearchStatus: async (reportId: string): Promise<ResearchStatus> => {
     const response = await api.get(`/research/status/${reportId}`)
     return response.data
   },